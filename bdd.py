@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Tuple
+
+# terminal nodes
+FALSE, TRUE = 0, 1
+
+
+class BDD:
+    # reduced ordered binary decision diagrams over a fixed variable order:
+    # nodes are hash-consed in a unique table, so every boolean function has
+    # exactly one node and equivalence is node equality
+    def __init__(self, variables: List[str]):
+        self.variables = variables
+        self.indices: Dict[str, int] = {name: level for level, name in enumerate(variables)}
+        # node -> level/low (variable is 0)/high (variable is 1)
+        # terminals sit below the last variable
+        self.levels: List[int] = [len(variables), len(variables)]
+        self.lows: List[int] = [FALSE, TRUE]
+        self.highs: List[int] = [FALSE, TRUE]
+        # (level, low, high) -> node
+        self.unique: Dict[Tuple[int, int, int], int] = {}
+        # (f, g, h) -> ite(f, g, h)
+        self.computed: Dict[Tuple[int, int, int], int] = {}
+        # id(token) -> node
+        self.built: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def node(self, level: int, low: int, high: int) -> int:
+        # redundant tests are skipped
+        if low == high:
+            return low
+        key = (level, low, high)
+        if key not in self.unique:
+            self.unique[key] = len(self.levels)
+            self.levels.append(level)
+            self.lows.append(low)
+            self.highs.append(high)
+        return self.unique[key]
+
+    def variable(self, name: str) -> int:
+        return self.node(self.indices[name], FALSE, TRUE)
+
+    def cofactors(self, u: int, level: int) -> Tuple[int, int]:
+        # u with the variable at the given level set to 0 and 1
+        if self.levels[u] == level:
+            return self.lows[u], self.highs[u]
+        return u, u
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        # if f then g else h, every other operation is a special case
+        # recursion depth is bounded by the number of variables
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        key = (f, g, h)
+        if key not in self.computed:
+            level = min(self.levels[f], self.levels[g], self.levels[h])
+            f0, f1 = self.cofactors(f, level)
+            g0, g1 = self.cofactors(g, level)
+            h0, h1 = self.cofactors(h, level)
+            self.computed[key] = self.node(level, self.ite(f0, g0, h0),
+                                           self.ite(f1, g1, h1))
+        return self.computed[key]
+
+    def build(self, token) -> int:
+        # shared subformulas are built once
+        for node in token.postorder():
+            if id(node) not in self.built:
+                operands = [self.built[id(child)] for child in node.children]
+                self.built[id(node)] = node.diagram(self, operands)
+        return self.built[id(token)]
+
+    # gates, see also CNF
+
+    def negate(self, u: int) -> int:
+        return self.ite(u, FALSE, TRUE)
+
+    def conjunction(self, nodes: List[int]) -> int:
+        u = TRUE
+        for node in nodes:
+            u = self.ite(u, node, FALSE)
+        return u
+
+    def disjunction(self, nodes: List[int]) -> int:
+        u = FALSE
+        for node in nodes:
+            u = self.ite(u, TRUE, node)
+        return u
+
+    def xor(self, nodes: List[int]) -> int:
+        u = FALSE
+        for node in nodes:
+            u = self.ite(u, self.negate(node), node)
+        return u
+
+    # queries, linear in the size of the diagram
+
+    def count(self, u: int) -> int:
+        # number of satisfying assignments over all variables
+        counts: Dict[int, int] = {FALSE: 0, TRUE: 1}
+
+        def paths(v: int) -> int:
+            # over the variables from v's level down,
+            # skipped variables may take either value
+            if v not in counts:
+                low, high = self.lows[v], self.highs[v]
+                counts[v] = (paths(low) << (self.levels[low] - self.levels[v] - 1)) + \
+                    (paths(high) << (self.levels[high] - self.levels[v] - 1))
+            return counts[v]
+
+        return paths(u) << self.levels[u]
+
+    def model(self, u: int, preferred: int = 0) -> Optional[Dict[str, int]]:
+        # satisfying assignment taking the preferred value wherever possible,
+        # i.e. the first one in table order, or None if unsatisfiable
+        if u == FALSE:
+            return None
+        values = [preferred] * len(self.variables)
+        # every node but FALSE leads to TRUE
+        while u != TRUE:
+            value = preferred
+            child = self.highs[u] if value else self.lows[u]
+            if child == FALSE:
+                value = 1 - value
+                child = self.highs[u] if value else self.lows[u]
+            values[self.levels[u]] = value
+            u = child
+        return dict(zip(self.variables, values))
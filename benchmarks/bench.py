@@ -0,0 +1,168 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from os import devnull, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import objects
+from fol import Token, gates
+from helpers import output_table, standardize_notations
+from objects import Argument, Proposition
+from parsing import parse
+from workloads import WORKLOADS
+
+PHASES = ['normalize', 'parse', 'compile', 'equality', 'table', 'is_valid',
+          'test_equivalence', 'output_table', 'csv', 'cli']
+# variable count beyond which tables are not drawn or written
+OUTPUT_VARIABLES = 16
+
+
+def phases(workload: Dict[str, Any], directory: str) -> Dict[str, Callable[[], Any]]:
+    # phase -> a single run of it on the workload
+    statement = workload['statement']
+    normalized = standardize_notations(statement)
+    proposition = Proposition(statement)
+    variables = proposition.variables
+    tokens = [parse(s) for s in workload['statements']]
+    table = Proposition(statement).truth_table
+    csv = path.join(directory, 'table.csv')
+
+    def draw():
+        with open(devnull, 'w') as null, redirect_stdout(null):
+            output_table(table)
+
+    return {'normalize': lambda: standardize_notations(statement),
+            'parse': lambda: parse(normalized),
+            # evaluators are dropped before every run, see cold
+            'compile': lambda: proposition.token.evaluator(variables, bitwise=True),
+            # every pair, as the command line does to report duplicates
+            'equality': lambda: [a == b for a in tokens for b in tokens],
+            'table': lambda: Proposition(statement).truth_table,
+            'is_valid': lambda: Argument(workload['premises'], workload['conclusion']).is_valid(),
+            'test_equivalence': lambda: Argument(workload['statements']).test_equivalence(),
+            'output_table': draw,
+            # written under a new name every time
+            'csv': lambda: output_table(table, filepath=csv),
+            'cli': lambda: subprocess.run([sys.executable, path.join(ROOT, 'logic.py'),
+                                           'check-validity', *workload['premises'],
+                                           '-c', workload['conclusion']],
+                                          stdout=subprocess.DEVNULL, check=True)}
+
+
+def cold():
+    # drop in-process memoization: subformula columns,
+    # gates and the evaluators compiled for every interned token
+    objects.column_memo.clear()
+    gates.clear()
+    classes = [Token]
+    while classes:
+        cls = classes.pop()
+        classes += cls.__subclasses__()
+        for token in list(cls.interned.values()):
+            token.__dict__.pop('_evaluators', None)
+
+
+def measure(run: Callable[[], Any], min_time: float) -> Tuple[int, float, int]:
+    # runs, seconds and peak bytes allocated by a single run,
+    # repeated until min_time has passed, each run starting cold
+    runs, seconds = 0, 0.0
+    while runs == 0 or seconds < min_time:
+        cold()
+        start = perf_counter()
+        run()
+        seconds += perf_counter() - start
+        runs += 1
+    cold()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return runs, seconds, peak
+
+
+def benchmark(workloads: List[str], sizes: List[int], selected: List[str],
+              min_time: float) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    for name in workloads:
+        for size in sizes:
+            workload = WORKLOADS[name](size)
+            variables = len(Proposition(workload['statement']).variables)
+            with TemporaryDirectory() as directory:
+                for phase, run in phases(workload, directory).items():
+                    if phase not in selected:
+                        continue
+                    if phase in ['output_table', 'csv'] and variables > OUTPUT_VARIABLES:
+                        continue
+                    runs, seconds, peak = measure(run, min_time)
+                    results.append({'workload': name, 'phase': phase, 'size': size,
+                                    'variables': variables, 'runs': runs, 'seconds': seconds,
+                                    'ops_per_sec': runs / seconds, 'peak_bytes': peak})
+                    print(f"{name} ({variables} variables) {phase}: "
+                          f"{runs / seconds:.4g} ops/s", file=sys.stderr)
+    return results
+
+
+def key(result: Dict[str, Any]) -> Tuple[str, str, int]:
+    return result['workload'], result['phase'], result['size']
+
+
+def summary(results: List[Dict[str, Any]],
+            baseline: Optional[List[Dict[str, Any]]] = None) -> List[List[str]]:
+    # scaling curves: a row per workload and phase, a column per size,
+    # with the speedup over the baseline, if any
+    previous = {key(result): result for result in baseline or []}
+    sizes = sorted({result['size'] for result in results})
+    rows: Dict[Tuple[str, str], Dict[int, str]] = {}
+    for result in results:
+        cell = f"{result['ops_per_sec']:.4g}/s, {result['peak_bytes'] / 1024:.4g} KiB"
+        if key(result) in previous:
+            cell += f" ({result['ops_per_sec'] / previous[key(result)]['ops_per_sec']:.2f}x)"
+        rows.setdefault((result['workload'], result['phase']), {})[result['size']] = cell
+    table = [['Workload', 'Phase', *[f"n = {size}" for size in sizes]]]
+    for (workload, phase), cells in rows.items():
+        table.append([workload, phase, *[cells.get(size, '') for size in sizes]])
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the propositional logic toolkit.')
+    parser.add_argument('-w', '--workloads', nargs='+', choices=list(WORKLOADS),
+                        default=list(WORKLOADS), metavar='WORKLOAD',
+                        help=f"Workloads to run: {', '.join(WORKLOADS)}.")
+    parser.add_argument('-s', '--sizes', nargs='+', type=int, default=[4, 8, 12, 16],
+                        metavar='N', help='Workload sizes, i.e. variable counts (pigeonhole \
+                            uses as many pigeons as fit).')
+    parser.add_argument('-p', '--phases', nargs='+', choices=PHASES, default=PHASES,
+                        metavar='PHASE', help=f"Phases to time: {', '.join(PHASES)}.")
+    parser.add_argument('-t', '--min-time', type=float, default=0.2, metavar='SECONDS',
+                        help='Minimum time spent repeating each phase.')
+    parser.add_argument('-o', '--output', type=str, default=None, metavar='FILE-PATH',
+                        help='Save the results as JSON.')
+    parser.add_argument('-b', '--baseline', type=str, default=None, metavar='FILE-PATH',
+                        help='Results of an earlier run to compare against.')
+    args = parser.parse_args()
+    assert min(args.sizes) >= 2, 'Workload sizes must be at least 2.'
+
+    results = benchmark(args.workloads, args.sizes, args.phases, args.min_time)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+    output_table(summary(results, baseline))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'date': datetime.now(timezone.utc).isoformat(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'results': results}, file, indent=2)
@@ -0,0 +1,77 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from os import path
+from time import perf_counter
+
+from typing import Any, Dict, List
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from helpers import output_table
+
+# command -> arguments of a minimal run of it, as called from shell scripts
+COMMANDS = {'python': None,
+            'help': ['-h'],
+            'make-table': ['make-table', 'a or b'],
+            'check-equivalence': ['check-equivalence', 'not (a or b)', 'not a and not b'],
+            'check-validity': ['check-validity', 'a -> b', 'a', 'b'],
+            'batch': ['batch', '-']}
+
+
+def startup(arguments: List[str] | None, runs: int, roots: List[str]) -> List[Dict[str, Any]]:
+    # wall time of whole processes, python itself being the floor,
+    # for each checkout in turn so that they all run under the same load
+    commands = [[sys.executable, '-c', 'pass'] if arguments is None else
+                [sys.executable, path.join(root, 'logic.py'), *arguments] for root in roots]
+    seconds: List[List[float]] = [[] for _ in roots]
+    for run in range(runs):
+        # alternate which checkout goes first
+        for index in (range(len(roots)) if run % 2 == 0 else reversed(range(len(roots)))):
+            start = perf_counter()
+            subprocess.run(commands[index], input=b'a and b\n', stdout=subprocess.DEVNULL, check=True)
+            seconds[index].append(perf_counter() - start)
+    return [{'runs': runs, 'min': min(times), 'mean': sum(times) / runs} for times in seconds]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the startup of the command line.')
+    parser.add_argument('-c', '--commands', nargs='+', choices=list(COMMANDS),
+                        default=list(COMMANDS), metavar='COMMAND',
+                        help=f"Commands to run: {', '.join(COMMANDS)}.")
+    parser.add_argument('-n', '--runs', type=int, default=20, metavar='N',
+                        help='Runs per command.')
+    parser.add_argument('-o', '--output', type=str, default=None, metavar='FILE-PATH',
+                        help='Save the results as JSON.')
+    parser.add_argument('-b', '--baseline', type=str, default=None, metavar='FILE-PATH',
+                        help='Results of an earlier run to compare against.')
+    parser.add_argument('-a', '--against', type=str, default=None, metavar='DIRECTORY',
+                        help='Another checkout to compare against, run in turn with this one.')
+    args = parser.parse_args()
+
+    roots = [ROOT] if args.against is None else [ROOT, path.abspath(args.against)]
+    timed = {command: startup(COMMANDS[command], args.runs, roots) for command in args.commands}
+    results = {command: times[0] for command, times in timed.items()}
+    baseline: Dict[str, Any] = {}
+    if args.against:
+        baseline = {command: times[1] for command, times in timed.items()}
+    elif args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+    table = [['Command', 'Min (ms)', 'Mean (ms)']]
+    for command, result in results.items():
+        row = [command, f"{1000 * result['min']:.1f}", f"{1000 * result['mean']:.1f}"]
+        if command in baseline:
+            row[1] += f" ({baseline[command]['min'] / result['min']:.2f}x)"
+        table.append(row)
+    output_table(table)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'date': datetime.now(timezone.utc).isoformat(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'results': results}, file, indent=2)
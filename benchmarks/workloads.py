@@ -0,0 +1,88 @@
+from typing import Any, Dict, List
+
+# a workload of a given size: a statement (for tables), an argument (premises
+# and conclusion, for validity) and a set of equivalent statements
+
+
+def names(count: int) -> List[str]:
+    return [f"x{index + 1}" for index in range(count)]
+
+
+def parity(size: int) -> Dict[str, Any]:
+    # chained biconditionals, i.e. nested binary expressions
+    variables = names(size)
+    chain = ' iff '.join(variables)
+    # x1 iff x2 iff ... is the parity of the variables (negated for an even count)
+    parity = ' xor '.join(variables)
+    if size % 2 == 0:
+        parity = f"not ({parity})"
+    return {'statement': chain,
+            'premises': [chain], 'conclusion': parity,
+            'statements': [chain, parity]}
+
+
+def conjunction(size: int) -> Dict[str, Any]:
+    # a single wide n-ary expression
+    variables = names(size)
+    conjunction = ' and '.join(variables)
+    return {'statement': conjunction,
+            'premises': [conjunction], 'conclusion': variables[-1],
+            'statements': [conjunction,
+                           ' and '.join(reversed(variables)),
+                           'not (' + ' or '.join(f"not {v}" for v in variables) + ')']}
+
+
+def ladder(size: int) -> Dict[str, Any]:
+    # deep implications: x1 -> (x2 -> (... -> xn))
+    variables = names(size)
+    ladder = ' -> '.join(variables)
+    return {'statement': ladder,
+            'premises': [f"{a} -> {b}" for a, b in zip(variables, variables[1:])],
+            'conclusion': f"{variables[0]} -> {variables[-1]}",
+            'statements': [ladder,
+                           ' or '.join([f"not {v}" for v in variables[:-1]] + variables[-1:])]}
+
+
+def pigeonhole(size: int) -> Dict[str, Any]:
+    # as many pigeons as fit in size variables, one hole short:
+    # if every pigeon is in a hole, some hole holds two of them
+    pigeons = 2
+    while (pigeons + 1) * pigeons <= size:
+        pigeons += 1
+    holes = range(1, pigeons)
+    placed = [' or '.join(f"p{pigeon}_{hole}" for hole in holes)
+              for pigeon in range(1, pigeons + 1)]
+    shared = ' or '.join(f"(p{first}_{hole} and p{second}_{hole})"
+                         for hole in holes
+                         for first in range(1, pigeons + 1)
+                         for second in range(first + 1, pigeons + 1))
+    statement = ' and '.join(f"({p})" for p in placed)
+    return {'statement': f"({statement}) -> ({shared})",
+            'premises': placed, 'conclusion': shared,
+            'statements': [statement, ' and '.join(f"({p})" for p in reversed(placed))]}
+
+
+def equivalences(size: int) -> Dict[str, Any]:
+    # many forms of De Morgan's law
+    variables = names(size)
+    nested = variables[0]
+    for variable in variables[1:]:
+        nested = f"({nested} or {variable})"
+    statements = ['not (' + ' or '.join(variables) + ')',
+                  'not (' + ' or '.join(reversed(variables)) + ')',
+                  f"not {nested}",
+                  ' and '.join(f"not {v}" for v in variables),
+                  ' and '.join(f"not {v}" for v in reversed(variables)),
+                  'not (' + ' or '.join(variables[::2] + variables[1::2]) + ')',
+                  f"not ({variables[0]} or not (" + ' and '.join(f"not {v}" for v in variables[1:]) + '))',
+                  '(' + ' or '.join(variables) + ') -> ' + f"({variables[0]} and not {variables[0]})"]
+    return {'statement': statements[0],
+            'premises': statements[:-1], 'conclusion': statements[-1],
+            'statements': statements}
+
+
+WORKLOADS = {'parity': parity,
+             'conjunction': conjunction,
+             'ladder': ladder,
+             'pigeonhole': pigeonhole,
+             'equivalences': equivalences}
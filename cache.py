@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from os import getpid, makedirs, path
+from time import time_ns
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Dict, Hashable, Optional, Tuple
+
+from constants import *
+
+# bytes a row of the results table is charged, given CACHE_OVERHEAD
+ROW_SIZE = 'LENGTH(key) + LENGTH(value) + ?'
+
+class ResultCache:
+    # results persisted across runs in a SQLite database, keyed by digests of
+    # canonical formulas (see Token.canonical_key), the least recently used
+    # ones are evicted once they take more than the given number of bytes,
+    # keys and CACHE_OVERHEAD per row included, as kept in meta ('bytes')
+    def __init__(self, directory: str, size: int = CACHE_SIZE):
+        # only runs using a cache pay for importing sqlite3
+        import sqlite3
+        makedirs(directory, exist_ok=True)
+        self.size = size
+        # other processes may be using the same cache
+        self.connection = sqlite3.connect(path.join(directory, CACHE_FILE), timeout=30)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS meta '
+                                    '(name TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS results '
+                                    '(key TEXT PRIMARY KEY, value BLOB NOT NULL, used INTEGER NOT NULL)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+            version = self.connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if version is None or version[0] != CACHE_VERSION:
+                # written by another version of the engine
+                self.connection.execute('DELETE FROM results')
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                                        (CACHE_VERSION,))
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('bytes', 0)")
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.connection:
+            row = self.connection.execute('SELECT value FROM results WHERE key = ?',
+                                          (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute('UPDATE results SET used = ? WHERE key = ?', (time_ns(), key))
+        return row[0]
+
+    def put(self, key: str, value: bytes):
+        with self.connection:
+            # written first so that the database is locked for writing right away
+            self.connection.execute(f"UPDATE meta SET value = value - COALESCE("
+                                    f"(SELECT {ROW_SIZE} FROM results WHERE key = ?), 0) "
+                                    f"WHERE name = 'bytes'", (CACHE_OVERHEAD, key))
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                    (key, value, time_ns()))
+            self.charge(len(key) + len(value) + CACHE_OVERHEAD)
+            self.evict()
+
+    def charge(self, size: int):
+        self.connection.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'", (size,))
+
+    @property
+    def used(self) -> int:
+        # bytes taken by all results, kept up to date on every insert and delete
+        return int(self.connection.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0])
+
+    def evict(self):
+        # least recently used first, a batch at a time, until the rest fit
+        while self.used > self.size:
+            freed = int(self.connection.execute(
+                f"SELECT TOTAL({ROW_SIZE}) FROM "
+                f"(SELECT key, value FROM results ORDER BY used LIMIT ?)",
+                (CACHE_OVERHEAD, CACHE_EVICT_BATCH)).fetchone()[0])
+            if freed == 0:
+                # nothing left to evict
+                self.connection.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+                break
+            self.connection.execute('DELETE FROM results WHERE key IN '
+                                    '(SELECT key FROM results ORDER BY used LIMIT ?)',
+                                    (CACHE_EVICT_BATCH,))
+            self.charge(-freed)
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute('DELETE FROM results')
+            self.connection.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+
+
+class LRUCache:
+    # in-process counterpart of ResultCache, the least recently used values
+    # are dropped once they take more than the given size in total,
+    # every entry counting the given overhead on top of its own size
+    def __init__(self, size: int, overhead: int = 0):
+        self.size = size
+        self.overhead = overhead
+        self.used = 0
+        # key -> (value, size), least recently used first
+        self.entries: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int):
+        if key in self.entries:
+            self.used -= self.entries.pop(key)[1]
+        size += self.overhead
+        self.entries[key] = (value, size)
+        self.used += size
+        while self.used > self.size:
+            _, (_, dropped) = self.entries.popitem(last=False)
+            self.used -= dropped
+
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
+
+
+def digest(*parts: str) -> str:
+    # cache key of a result, e.g. digest('tautology', token.canonical_key)
+    # hashlib is slow to import, and only runs using a cache need it
+    from hashlib import sha256
+    return sha256('\0'.join(parts).encode()).hexdigest()
+
+
+# (process, thread, directory) -> cache, connections are not shared
+# with forked workers or other threads
+caches: Dict[Tuple[int, int, str], ResultCache] = {}
+
+
+def open_cache(directory: str, size: int = CACHE_SIZE) -> ResultCache:
+    # connections can only be used by the thread that opened them,
+    # e.g. paired tests are run in a thread of their own
+    from threading import get_ident
+    directory = path.realpath(path.expanduser(directory))
+    key = (getpid(), get_ident(), directory)
+    if key not in caches:
+        caches[key] = ResultCache(directory, size)
+    return caches[key]
@@ -0,0 +1,641 @@
+from __future__ import annotations
+
+import argparse
+from sys import argv, exit, stderr, stdin, stdout
+
+# the toolkit itself is imported once the arguments are parsed (see below),
+# and modules needed by a single subcommand (readline, jobs, server)
+# by that subcommand only, to keep the startup short
+from constants import *
+
+
+def interactive():
+    # avoid arrow key values
+    # reference: https://stackoverflow.com/a/66539061/10446972
+    import readline
+
+
+def add_make_table_parser(subparsers: argparse._SubParsersAction):
+    make_table_parser = subparsers.add_parser('make-table',
+                                              help='Make a truth table for the given propositional statement.')
+    make_table_parser.add_argument('table_statement',
+                                   nargs='?', type=str, action='store', default=None,
+                                   metavar=('STATEMENT'),
+                                   help='A propositional statement.')
+    make_table_parser.add_argument('-l', '--labels',
+                                   type=str, action='store', default=None,
+                                   metavar=('[FALSE][TRUE]'),
+                                   help='Custom labels for truth values.')
+    make_table_parser.add_argument('-n', '--no-atoms',
+                                   action='store_true', default=False,
+                                   help='Do not include atomic sentences in the table.')
+    make_table_parser.add_argument('-r', '--reverse-values',
+                                   action='store_true', default=False,
+                                   help='Reverse the order of the truth values in the table.')
+    make_table_parser.add_argument('--cache',
+                                   type=str, action='store', default=None,
+                                   metavar=('DIRECTORY'),
+                                   help='Directory of a persistent cache of results, reused across runs.')
+    make_table_parser.add_argument('--profile',
+                                   nargs='?', type=str.lower, choices=['table', 'json'],
+                                   action='store', const='table', default=None,
+                                   metavar=('FORMAT'),
+                                   help='Print the time spent in each phase to standard error, as tables (default) or JSON.')
+    make_table_parser.add_argument('-j', '--jobs',
+                                   type=int, action='store', default=1,
+                                   metavar=('N'),
+                                   help='Number of processes evaluating large tables, 0 for all cores.')
+    make_table_parser.add_argument('-o', '--output',
+                                   type=str, action='store',
+                                   metavar=('FILE-PATH'),
+                                   help='The file path to be saved, the format is detected from its extension \
+                                        (.csv by default, .ltt, .npz or .parquet).')
+
+
+def add_check_equivalence_parser(subparsers: argparse._SubParsersAction):
+    check_equivalence_parser = subparsers.add_parser('check-equivalence',
+                                                     help="Check if multiple statements are logically equivalent.")
+    check_equivalence_parser.add_argument('equivalent_statements',
+                                          nargs='*', type=str, action='store', default=None,
+                                          metavar=('STATEMENT'),
+                                          help='A set of propositional statements to be checked.')
+    check_equivalence_parser.add_argument('-l', '--labels',
+                                          type=str, action='store', default=None,
+                                          metavar=('[FALSE][TRUE]'),
+                                          help='Custom labels for truth values.')
+    check_equivalence_parser.add_argument('-m', '--mode',
+                                          type=str.lower, choices=['default',
+                                                                   'paired',
+                                                                   'tree'],
+                                          action='store', default='default',
+                                          metavar=('MODE'),
+                                          help='Mode for testing logical equivalences.')
+    check_equivalence_parser.add_argument('-r', '--reverse-values',
+                                          action='store_true', default=False,
+                                          help='Reverse the order of the truth values in the table.')
+    check_equivalence_parser.add_argument('--cache',
+                                          type=str, action='store', default=None,
+                                          metavar=('DIRECTORY'),
+                                          help='Directory of a persistent cache of results, reused across runs.')
+    check_equivalence_parser.add_argument('--profile',
+                                          nargs='?', type=str.lower, choices=['table', 'json'],
+                                          action='store', const='table', default=None,
+                                          metavar=('FORMAT'),
+                                          help='Print the time spent in each phase to standard error, as tables (default) or JSON.')
+    check_equivalence_parser.add_argument('-j', '--jobs',
+                                          type=int, action='store', default=1,
+                                          metavar=('N'),
+                                          help='Number of processes evaluating large tables, 0 for all cores. '
+                                               'Checks past 20 variables use the SAT solver on one core.')
+    check_equivalence_parser.add_argument('-o', '--output',
+                                          type=str, action='store',
+                                          metavar=('FILE-PATH'),
+                                          help='The file path to be saved, the format is detected from its extension \
+                                            (.csv by default, .ltt, .npz or .parquet). \
+                                            This flag is ignored when mode is set to paired.')
+
+
+def add_check_validity_parser(subparsers: argparse._SubParsersAction):
+    check_validity_parser = subparsers.add_parser('check-validity',
+                                                  help='Check if an argument is valid.')
+    check_validity_parser.add_argument('arg_premises',
+                                       nargs='*', type=str, action='store', default=None,
+                                       metavar=('PREMISE'),
+                                       help='A set of premises.')
+    check_validity_parser.add_argument('-c', '--conclusion',
+                                       type=str, action='store', default=None,
+                                       help='(Optional) The conclusion of the argument. \
+                                        The last premise will be used as the conclusion if one is\'t provided.')
+    check_validity_parser.add_argument('-l', '--labels',
+                                       type=str, action='store', default=None,
+                                       metavar=('[FALSE][TRUE]'),
+                                       help='Custom labels for truth values.')
+    check_validity_parser.add_argument('-r', '--reverse-values',
+                                       action='store_true', default=False,
+                                       help='Reverse the order of the truth values in the table.')
+    check_validity_parser.add_argument('--cache',
+                                       type=str, action='store', default=None,
+                                       metavar=('DIRECTORY'),
+                                       help='Directory of a persistent cache of results, reused across runs.')
+    check_validity_parser.add_argument('--profile',
+                                       nargs='?', type=str.lower, choices=['table', 'json'],
+                                       action='store', const='table', default=None,
+                                       metavar=('FORMAT'),
+                                       help='Print the time spent in each phase to standard error, as tables (default) or JSON.')
+    check_validity_parser.add_argument('-j', '--jobs',
+                                       type=int, action='store', default=1,
+                                       metavar=('N'),
+                                       help='Number of processes evaluating large tables, 0 for all cores. '
+                                            'Checks past 20 variables use the SAT solver on one core.')
+    check_validity_parser.add_argument('-o', '--output', type=str, action='store',
+                                       metavar=('FILE-PATH'),
+                                       help='The file path to be saved, the format is detected from its extension \
+                                        (.csv by default, .ltt, .npz or .parquet).')
+
+
+def add_batch_parser(subparsers: argparse._SubParsersAction):
+    batch_parser = subparsers.add_parser('batch',
+                                         help='Run jobs from a file, one per line, and write the results as JSON lines.')
+    batch_parser.add_argument('batch_file',
+                              nargs='?', type=str, action='store', default='-',
+                              metavar=('FILE-PATH'),
+                              help='A file of jobs, one per line. Reads from standard input if omitted or -.')
+    batch_parser.add_argument('-c', '--command',
+                              type=str.lower, choices=JOB_COMMANDS,
+                              action='store', default=JOB_COMMANDS[0],
+                              metavar=('COMMAND'),
+                              help='Command for plain-text jobs and JSON jobs without a "command" key. \
+                                Plain-text jobs separate statements by semicolons, \
+                                the last one being the conclusion for check-validity.')
+    batch_parser.add_argument('-n', '--no-atoms',
+                              action='store_true', default=False,
+                              help='Do not include atomic sentences in the tables.')
+    batch_parser.add_argument('-r', '--reverse-values',
+                              action='store_true', default=False,
+                              help='Reverse the order of the truth values in the tables.')
+    batch_parser.add_argument('--cache',
+                              type=str, action='store', default=None,
+                              metavar=('DIRECTORY'),
+                              help='Directory of a persistent cache of results, reused across runs.')
+    batch_parser.add_argument('--profile',
+                              nargs='?', type=str.lower, choices=['table', 'json'],
+                              action='store', const='table', default=None,
+                              metavar=('FORMAT'),
+                              help='Print the time spent in each phase to standard error, as tables (default) or JSON.')
+    batch_parser.add_argument('-j', '--jobs',
+                              type=int, action='store', default=1,
+                              metavar=('N'),
+                              help='Number of processes evaluating large tables, 0 for all cores. '
+                                   'Checks past 20 variables use the SAT solver on one core.')
+
+
+def add_serve_parser(subparsers: argparse._SubParsersAction):
+    serve_parser = subparsers.add_parser('serve',
+                                         help='Answer jobs sent as JSON requests, over HTTP or a Unix socket, until interrupted.')
+    serve_parser.add_argument('-s', '--socket',
+                              type=str, action='store', default=None,
+                              metavar=('SOCKET-PATH'),
+                              help='Listen on a Unix socket for JSON lines instead of HTTP.')
+    serve_parser.add_argument('-p', '--port',
+                              type=int, action='store', default=SERVER_PORT,
+                              metavar=('PORT'),
+                              help=f"Port of the HTTP server on {SERVER_HOST} ({SERVER_PORT} by default).")
+    serve_parser.add_argument('-c', '--command',
+                              type=str.lower, choices=JOB_COMMANDS,
+                              action='store', default=JOB_COMMANDS[0],
+                              metavar=('COMMAND'),
+                              help='Command for jobs without a "command" key.')
+    serve_parser.add_argument('-n', '--no-atoms',
+                              action='store_true', default=False,
+                              help='Do not include atomic sentences in the tables.')
+    serve_parser.add_argument('-r', '--reverse-values',
+                              action='store_true', default=False,
+                              help='Reverse the order of the truth values in the tables.')
+    serve_parser.add_argument('--cache',
+                              type=str, action='store', default=None,
+                              metavar=('DIRECTORY'),
+                              help='Directory of a persistent cache of results, reused across runs.')
+    serve_parser.add_argument('-j', '--jobs',
+                              type=int, action='store', default=1,
+                              metavar=('N'),
+                              help='Number of processes answering requests, 0 for all cores.')
+
+
+# subcommand -> setup of its arguments
+SUBCOMMANDS = {'make-table': add_make_table_parser,
+               'check-equivalence': add_check_equivalence_parser,
+               'check-validity': add_check_validity_parser,
+               'batch': add_batch_parser,
+               'serve': add_serve_parser}
+
+parser = argparse.ArgumentParser(prog='Logic',
+                                 description='A propositional logic toolkit.',
+                                 epilog='')
+
+subparsers = parser.add_subparsers()
+# only the chosen subcommand is set up, all of them for the help
+for command, add_subparser in SUBCOMMANDS.items():
+    if len(argv) < 2 or argv[1] not in SUBCOMMANDS or argv[1] == command:
+        add_subparser(subparsers)
+
+
+# get arguments
+args = parser.parse_args()
+opts = vars(args)
+
+# -h and bad arguments exit above, without loading any of these
+import atexit
+from contextlib import redirect_stdout
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Tuple
+
+from helpers import (bold, check_table_format, confirm, display, green, output_table, red,
+                     separator, table_format)
+from objects import Argument, Config, Proposition, Session
+from profiling import profiler
+
+
+if opts.get('profile'):
+    # from parsing to the last output, reported on exit
+    profiler.enable()
+
+    def report_profile():
+        with redirect_stdout(stderr):
+            if args.profile == 'json':
+                print(profiler.to_json())
+            else:
+                for table in profiler.summary():
+                    output_table(table)
+
+    atexit.register(report_profile)
+
+if opts.get('output'):
+    # a missing library is reported before any work, not after it
+    try:
+        check_table_format(args.output.strip())
+    except AssertionError as err:
+        print(err)
+        exit()
+
+
+if 'table_statement' in opts.keys():
+    # make truth table
+    def make_table(statement: str):
+        config = Config(reverse=args.reverse_values,
+                        labels=args.labels,
+                        atoms=(not args.no_atoms),
+                        workers=args.jobs,
+                        cache=args.cache)
+        # get output file name
+        filename = args.output.strip() if args.output else None
+        if filename and table_format(filename) == '.ltt':
+            # evaluate straight into the file
+            config.spill = filename
+        statement = Proposition(statement, config=config)
+
+        if config.spill:
+            statement.truth_table
+        else:
+            statement.output_truth_table(filepath=filename)
+
+    if args.table_statement:
+        statement = args.table_statement.strip()
+        if statement != '':
+            try:
+                make_table(statement)
+            except Exception as err:
+                print(err)
+            exit()
+
+    # interactive mode
+    interactive()
+    while True:
+        try:
+            statement = input('Enter a statement: ').strip()
+        except (KeyboardInterrupt, EOFError):
+            break  # exit
+
+        if statement == '':
+            exit()
+
+        try:
+            make_table(statement)
+        except Exception as err:
+            print(err)
+            continue
+
+elif 'equivalent_statements' in opts.keys():
+    # check equivalence
+    config = Config(reverse=args.reverse_values,
+                    labels=args.labels,
+                    workers=args.jobs,
+                    cache=args.cache)
+
+    def check_equivalence(statements: List[Proposition] | List[str]):
+        # parse and compile all statements
+        statements: Argument = Argument(statements, config=config)
+
+        # get output file name
+        filename = args.output.strip() if args.output else None
+
+        if args.mode == 'default':
+            if statements.use_solver:
+                print(SAT_NOTE.format(len(statements.variables)))
+                filename = None
+            else:
+                statements.output_truth_table(annotate='equivalence', filepath=filename)
+
+        equivalent = statements.test_equivalence(mode=args.mode)
+
+        print(end=('' if filename else '\n'))
+
+        # print conclusion
+        if equivalent:
+            # equivalent
+            print(
+                bold(green(CHECK_MARK,
+                           'The sentences are logically equivalent!'))
+            )
+        else:
+            # not equivalent
+            print(
+                bold(red(CROSS_MARK,
+                         'The sentences are not logically equivalent!'))
+            )
+        
+        print()
+
+    if args.equivalent_statements:
+        # strip all statements
+        statements = [s.strip() for s in args.equivalent_statements]
+        # filter empty statements
+        statements = [s for s in statements if s != '']
+
+        if len(statements) < 2:
+            print('At least 2 sentences are required.')
+            exit()
+
+        # create proposition objects
+        statements: List[Proposition] = [Proposition(s) for s in statements]
+
+        # display statements
+        print()
+        for index, statement in enumerate(statements):
+            print(f"{index + 1}.", display(statement))
+        print()
+
+        # filter statements with equivalent forms
+        equivalent_statements: List[Tuple[int, Proposition,
+                                          List[Tuple[int, Proposition]]]] = []
+        for i, s1 in enumerate(statements[:-1]):
+            # skip the ones pending removal
+            if not s1:
+                continue
+            # equivalent pairs
+            equivalents: List[Proposition] = []
+            for j, s2 in enumerate(statements[i + 1:]):
+                if s1 == s2:
+                    # get index to s2
+                    index = i + j + 1
+                    equivalents.append((index + 1, s2))
+                    # mark the later for removal
+                    statements[index] = None
+            # add to list only if there are equivalents
+            if len(equivalents) > 0:
+                equivalent_statements.append((i + 1, s1, equivalents))
+        statements = [s for s in statements if s is not None]
+
+        if len(equivalent_statements) > 0:
+            print('The following are commutative/associative-equivalent:')
+            for (i, p1, p2s) in equivalent_statements:
+                for (j, p2) in p2s:
+                    print(f"({i})",
+                          display(p1) + EQUIV_SYMBOL + f"({j})",
+                          display(p2))
+            print()
+            # check the other statements
+            if len(statements) > 1:
+                print(BOX_INNER_HLINE * 50, end='\n\n')
+                check_equivalence(statements)
+        else:
+            check_equivalence(statements)
+        exit()
+
+    # interactive mode
+    interactive()
+    while True:
+        statements: List[Proposition] = []
+        # verdict so far, updated as statements are entered
+        session = Session(config)
+        while True:
+            try:
+                statement = input(f"({len(statements) + 1}) ").strip()
+            except (KeyboardInterrupt, EOFError):
+                exit()
+
+            if statement == '':
+                break
+
+            try:
+                statement = Proposition(statement)
+            except Exception as err:
+                print(err)
+                continue
+
+            # get prior commutative/associative-equivalent statements
+            equivalences = []
+            for s in statements:
+                if statement == s:
+                    equivalences.append(s)
+            if len(equivalences) > 0:
+                print('The sentence is commutative/associative-equivalent to:')
+                for s in equivalences:
+                    print('>', display(s))
+            else:
+                print(display(statement))
+                statements.append(statement)
+                session.add(statement)
+                if len(statements) > 1:
+                    if session.is_equivalent():
+                        print(green(CHECK_MARK, 'Equivalent so far.'))
+                    else:
+                        print(red(CROSS_MARK, 'Not equivalent so far.'))
+
+        if statements == []:
+            exit()
+        elif len(statements) == 1:
+            print('At least 2 sentences are required.')
+        else:
+            print()
+            check_equivalence(statements)
+
+elif 'arg_premises' in opts.keys():
+    # check validity
+    config = Config(reverse=args.reverse_values,
+                    labels=args.labels,
+                    log_countermodel=True,
+                    workers=args.jobs,
+                    cache=args.cache)
+
+    def check_validity(premises: List[Proposition],
+                       conclusion: Proposition):
+        # parse and compile all statements
+        argument = Argument(premises, conclusion, config=config)
+
+        # get output file name
+        filename = args.output.strip() if args.output else None
+
+        if argument.use_solver:
+            print(SAT_NOTE.format(len(argument.variables)))
+            filename = None
+        else:
+            argument.output_truth_table(annotate='validity', filepath=filename)
+
+        valid = argument.is_valid()
+
+        print(end=('' if filename else '\n'))
+
+        # print conclusion
+        if valid:
+            # valid
+            print(bold(green(CHECK_MARK, 'The argument is valid!')))
+        else:
+            # invalid
+            print(bold(red(CROSS_MARK, 'The argument is invalid!')))
+
+        print()
+    
+    def display_argument(premises: List[Proposition],
+                         conclusion: Proposition):
+        # display argument, confirm
+        print()
+        max_length = 0
+        for index, premise in enumerate(premises):
+            display_text_length = len(str(premise))
+            # update max length
+            if display_text_length > max_length:
+                max_length = display_text_length
+            print(f"{index + 1}.", display(premise))
+        # separate w/ max length of display premises + 5
+        separator(max_length + 5)
+        print(u'\u2234', display(conclusion), end='\n\n')
+
+    if args.arg_premises:
+        # strip all premises
+        premises = [p.strip() for p in args.arg_premises]
+        # filter empty premises
+        premises = [p for p in premises if p != '']
+
+        # take last premise as conclusion if none provided
+        conclusion = premises[-1]
+        if args.conclusion:
+            # conclusion is given
+            conclusion = args.conclusion.strip()
+        else:
+            # exclude the last premise since it was used as conclusion
+            premises = premises[:-1]
+
+        premises = [Proposition(p) for p in premises]
+        conclusion = Proposition(conclusion)
+
+        display_argument(premises, conclusion)
+
+        check_validity(premises, conclusion)
+        exit()
+
+    # interactive mode
+    interactive()
+    while True:
+        premises: List[Proposition] = []
+        # each premise is checked as the conclusion of the ones before it,
+        # as it would be if the conclusion is left empty
+        session = Session(config)
+        while True:
+            try:
+                premise = input(f"Premise {len(premises) + 1}: ").strip()
+            except (KeyboardInterrupt, EOFError):
+                exit()
+
+            if premise == '':
+                break
+
+            try:
+                premise = Proposition(premise)
+            except Exception as err:
+                print(err)
+                continue
+
+            print(display(premise))
+            premises.append(premise)
+            session.add(premise)
+            if len(premises) > 1:
+                if session.find_countermodel() is None:
+                    print(green(CHECK_MARK, 'Follows from the premises above.'))
+                else:
+                    print(red(CROSS_MARK, 'Does not follow from the premises above.'))
+
+        if premises == []:
+            exit()
+
+        while True:
+            try:
+                conclusion = input('Conclusion: ').strip()
+            except (KeyboardInterrupt, EOFError):
+                exit()
+
+            if conclusion == '':
+                # conclusion is not given
+                if len(premises) > 1:
+                    # take last premise as conclusion
+                    conclusion = premises[-1]
+                    premises = premises[:-1]
+                    break
+                else:
+                    print('No conclusion is provided or not enough premises.')
+                    print('NOTE: An argument needs at least 1 premise and 1 conclusion.')
+                    continue
+            else:
+                try:
+                    conclusion = Proposition(conclusion)
+                except Exception as err:
+                    print(err)
+                    continue
+
+                print(display(conclusion))
+                # extends the premises' columns to the conclusion's variables
+                session.add(conclusion)
+                break
+
+        display_argument(premises, conclusion)
+
+        if confirm('Check? (Y/n)'):
+            print()
+            check_validity(premises, conclusion)
+
+elif 'batch_file' in opts.keys():
+    # batch mode: everything is set up once for all jobs
+    import json
+    from jobs import load_job, make_job, run_job
+
+    config = Config(reverse=args.reverse_values,
+                    atoms=(not args.no_atoms),
+                    workers=args.jobs,
+                    cache=args.cache)
+
+    jobs = stdin if args.batch_file == '-' else open(args.batch_file)
+    with jobs:
+        for line in jobs:
+            line = line.strip()
+            if line == '':
+                continue
+            job = None
+            try:
+                job = load_job(line)
+                result = run_job(make_job(job, args.command), config)
+            except Exception as err:
+                result = {'job': line, 'error': str(err)}
+            if isinstance(job, dict) and 'id' in job:
+                # errors too, so that they can be matched to their jobs
+                result = {'id': job['id'], **result}
+            stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+    exit()
+
+elif 'socket' in opts.keys():
+    # server mode: a warm process for many requests
+    from server import serve
+
+    config = Config(reverse=args.reverse_values,
+                    atoms=(not args.no_atoms),
+                    workers=args.jobs,
+                    cache=args.cache)
+    try:
+        serve(config, socket=args.socket, port=args.port,
+              workers=config.workers, command=args.command)
+    except KeyboardInterrupt:
+        pass
+    exit()
+
+else:
+    parser.print_help()
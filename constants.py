@@ -10,6 +10,26 @@ NOT_OP = 'not '
 IMPLIES_OP = ' -> '
 IFF_OP = ' iff '
 
+# number of trailing variables evaluated at once per chunk of rows
+CHUNK_VARIABLES = 16
+# variable count beyond which validity/equivalence is checked by the SAT solver
+SAT_THRESHOLD = 20
+# bytes buffered when writing csv files
+CSV_BUFFER_SIZE = 1 << 16
+# commands a batch/server job can run, the first one is the default
+JOB_COMMANDS = ['make-table', 'check-equivalence', 'check-validity']
+# command -> keys its jobs need (after "statements" are filled in)
+JOB_KEYS = {'make-table': ['statement'],
+            'check-equivalence': ['statements'],
+            'check-validity': ['premises', 'conclusion']}
+# address of the HTTP server
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8750
+# bytes of results the server keeps in memory
+SERVER_CACHE_SIZE = 1 << 26
+# random assignments fingerprinting statements with too many variables for a truth vector
+FINGERPRINT_ROWS = 256
+
 
 # check/cross mark
 MARK_COLUMN = ' '
@@ -37,6 +57,36 @@ BOX_BOTTOM_T = '\u2537'
 
 EQUIV_SYMBOL = ' \u2261 '
 
+# truth table file formats by extension, the first one is the default
+TABLE_FORMATS = ['.csv', '.ltt', '.npz', '.parquet']
+# formats needing an optional library: extension -> (library, module)
+TABLE_LIBRARIES = {'.npz': ('NumPy', 'numpy'), '.parquet': ('PyArrow', 'pyarrow.parquet')}
+# bytes of a column scanned at once when searching truth tables
+SCAN_BLOCK_SIZE = 1 << 16
+# leading bytes of packed binary truth table (.ltt) files
+TABLE_MAGIC = b'LTT\x01'
+
+# result cache database, in the cache directory
+CACHE_FILE = 'results.sqlite3'
+# bump whenever results may change, stale caches are then cleared
+CACHE_VERSION = '2'
+# bytes of results kept before the least recently used ones are evicted
+CACHE_SIZE = 1 << 28
+# bytes charged per result on top of its key and value: the last use,
+# SQLite's row and index overhead (about 124 bytes per small result)
+CACHE_OVERHEAD = 128
+# least recently used results evicted at once
+CACHE_EVICT_BATCH = 256
+# variable count beyond which truth table columns are not cached
+CACHE_VARIABLES = 20
+# engines whose whole-table columns of subformulas are memoized in process
+MEMO_ENGINES = ['bitwise', 'bdd']
+# bytes of subformula columns memoized in process
+MEMO_SIZE = 1 << 26
+# bytes counted per memoized column on top of its own: keys pin their
+# tokens and compiled evaluators, which outweigh the columns of small tables
+MEMO_OVERHEAD = 1 << 10
+
 # operator regex patterns
 AND_PATTERNS = r'[&\*\u2227\u22c5]+|\b(AND|and)\b'
 
@@ -54,10 +104,18 @@ IFF_PATTERNS = r'<-+>|\u21d4|\u27f7|\u2194|\u27fa|\b(IFF|iff)\b'
 # error messages
 UNEXPECTED_ERROR = 'An unexpected error occurred:'
 NULL_SENTENCE = '[Syntax Error] Null sentence.'
-UNMATCHED_PARENTHESES = '[Syntax Error] Unmatched parentheses.'
-MISSING_COMPONENTS = '[Syntax error] Missing an operand/operator in expression '
+UNMATCHED_PARENTHESES = '[Syntax Error] Unmatched parentheses at position {}.'
+MISSING_OPERAND = '[Syntax Error] Missing an operand at position {}.'
+MISSING_OPERATOR = '[Syntax Error] Missing an operator at position {}.'
 CUSTOM_LABEL_LENGTH_ERROR = 'Custom label string must be of length 2.'
 CUSTOM_LABEL_IDENTICAL_ERROR = 'Custom labels must be different.'
+TABLE_EXPORT_ERROR = 'Only truth tables can be saved as {} files.'
+TABLE_FILE_ERROR = 'Not a truth table file: {}'
+MISSING_LIBRARY = '{} is required for {} files.'
+BAD_JOB = 'A job must be a JSON object, array or string.'
+UNKNOWN_COMMAND = 'Unknown command: {}'
+MISSING_JOB_KEYS = 'A {} job needs {}.'
+SAT_NOTE = 'Too many variables ({}) for a truth table, checking with the SAT solver instead.'
 NAME_HELP = '''Rules:
 1. Contains only alpha-numeric characters and underscores.
 2. Must not start with a number.
@@ -1,32 +1,211 @@
-from itertools import permutations
+from __future__ import annotations
 
-from typing import List
+from weakref import WeakValueDictionary
 
-from helpers import unique
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from profiling import profiler
 
 class Token:
     pass
 
 
-class Token:
+class TokenFactory(type):
+    # hash-consing: building the same token twice returns the same node
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        # children are interned too, so they are keyed by identity
+        cls.interned = WeakValueDictionary()
+
+    def __call__(cls, *args):
+        key = tuple(arg if isinstance(arg, str) else id(arg) for arg in args)
+        token = cls.interned.get(key)
+        if token is None:
+            token = super().__call__(*args)
+            # the first token built with a canonical form represents all
+            # commutative/associative-equivalent ones, see Token.__eq__
+            form = token.canonical_form = token.canonical()
+            token.canonical_token = canonical_forms.setdefault(form, token)
+            token.structural_hash = hash(form)
+            cls.interned[key] = token
+        return token
+
+
+# canonical form -> representative token
+canonical_forms: WeakValueDictionary = WeakValueDictionary()
+
+# maximum number of operands chained in a single python expression
+CHAIN_LIMIT = 32
+
+# (token type, number of children) -> bitwise operation, see Token.gate
+gates: Dict[Tuple[type, int], Callable[..., int]] = {}
+
+
+class Token(metaclass=TokenFactory):
+    @property
+    def children(self) -> Tuple[Token, ...]:
+        return ()
+
     @property
-    def display_text(self) -> str: pass
+    def display_text(self) -> str:
+        return self.fold(lambda token, operands: token.display(operands))
 
     @property
-    def source(self) -> str: pass
+    def source(self) -> str:
+        return self.fold(lambda token, operands: token.operation(operands))
 
     @property
-    def variables(self) -> List[str]: pass
+    def variables(self) -> List[str]:
+        return [token.name for token in self.postorder() if isinstance(token, Variable)]
 
     @property
     def sentences(self) -> List[Token]:
-        return []
+        return [token for token in self.postorder() if not isinstance(token, Variable)]
+
+    @property
+    def canonical_key(self) -> str:
+        # textual canonical form, equal for equal tokens (see __eq__) and,
+        # unlike canonical(), stable across processes, e.g. for persistent caches
+        key: Optional[str] = self.__dict__.get('_canonical_key')
+        if key is None:
+            # id(n-ary token) -> its operands' keys, merged by associativity
+            merged: Dict[int, List[str]] = {}
+
+            def combine(token: Token, operands: List[str]) -> str:
+                if not isinstance(token, NaryExpression):
+                    return token.key(operands)
+                keys: List[str] = []
+                for child, operand in zip(token.children, operands):
+                    keys += merged[id(child)] if type(child) is type(token) else [operand]
+                merged[id(token)] = sorted(keys)
+                return token.key(merged[id(token)])
+
+            key = self.__dict__['_canonical_key'] = self.fold(combine)
+        return key
 
     def __repr__(self) -> str:
         return self.display_text
 
+    def __eq__(self, __value) -> bool:
+        # same canonical form, compared in O(1)
+        if profiler.enabled:
+            profiler.count('comparisons')
+        if isinstance(__value, Token):
+            return self.canonical_token is __value.canonical_token
+        return False
+
+    def __hash__(self) -> int:
+        return self.structural_hash
+
+    def __reduce__(self):
+        # pickled as a flat postorder program rebuilt through the constructors,
+        # so that deep formulas don't hit the recursion limit and tokens are
+        # interned on the other side, e.g. in worker processes
+        order = self.postorder()
+        indices = {id(token): index for index, token in enumerate(order)}
+        program = [(type(token), (token.name,) if isinstance(token, Variable) else
+                    tuple(indices[id(child)] for child in token.children))
+                   for token in order]
+        return rebuild, (program,)
+
+    def postorder(self) -> List[Token]:
+        # distinct tokens, children first and from left to right
+        # iterative so that deeply nested formulas don't hit the recursion limit
+        order: List[Token] = []
+        visited = set()
+        stack: List[Tuple[Token, bool]] = [(self, False)]
+        while stack:
+            token, expanded = stack.pop()
+            if expanded:
+                order.append(token)
+            elif id(token) not in visited:
+                visited.add(id(token))
+                stack.append((token, True))
+                stack += [(child, False) for child in reversed(token.children)]
+        return order
+
+    def fold(self, combine: Callable[[Token, List[Any]], Any]) -> Any:
+        # combine every token with the results of its children, bottom-up
+        results: Dict[int, Any] = {}
+        for token in self.postorder():
+            operands = [results[id(child)] for child in token.children]
+            results[id(token)] = combine(token, operands)
+        return results[id(self)]
+
+    def canonical(self) -> tuple: pass
+
+    def key(self, operands: List[str]) -> str: pass
+
+    def display(self, operands: List[str]) -> str: pass
+
+    def operation(self, operands: List[str], one: str = '1') -> str: pass
+
+    def evaluator(self, variables: Sequence[str],
+                  bitwise: bool = False) -> Callable[..., int]:
+        # compile once per variable ordering into straight-line code taking
+        # the truth values positionally, one statement per distinct token:
+        # def evaluate(_v0, _v1):
+        #     _t0 = (1&~_v0)
+        #     _t1 = (_t0|_v1)
+        #     return _t1
+        # bitwise evaluators take the all-ones mask first and evaluate
+        # whole packed columns at once, e.g. def evaluate(_m, _v0, _v1): ...
+        key = (tuple(variables), bitwise)
+        evaluators: Dict[tuple, Callable[..., int]] = self.__dict__.setdefault('_evaluators', {})
+        if key not in evaluators:
+            with profiler.phase('compile'):
+                slots = {name: f"_v{index}" for index, name in enumerate(variables)}
+                params = list(slots.values())
+                one = '1'
+                if bitwise:
+                    one = '_m'
+                    params.insert(0, one)
+                lines: List[str] = []
+
+                def statement(token: Token, operands: List[str]) -> str:
+                    if isinstance(token, Variable):
+                        return slots[token.name]
+                    name = f"_t{len(lines)}"
+                    lines.append(f"    {name} = {token.operation(operands, one)}")
+                    return name
+
+                result = self.fold(statement)
+                source = '\n'.join([f"def evaluate({', '.join(params)}):",
+                                    *lines,
+                                    f"    return {result}"])
+                namespace = {}
+                exec(compile(source, '<token>', 'exec'), namespace)
+                evaluators[key] = namespace['evaluate']
+        return evaluators[key]
+
+    def gate(self) -> Callable[..., int]:
+        # bitwise operation of this token alone, taking the all-ones mask
+        # and the packed columns of its children, e.g. lambda _m, _o0: (_m&~_o0)
+        key = (type(self), len(self.children))
+        if key not in gates:
+            params = [f"_o{index}" for index in range(len(self.children))]
+            with profiler.phase('compile'):
+                gates[key] = eval(f"lambda _m, {', '.join(params)}: {self.operation(params, '_m')}")
+        return gates[key]
+
+    def encode(self, cnf, operands: List[int]) -> int: pass
+
+    def diagram(self, bdd, operands: List[int]) -> int: pass
+
     def evaluate(self, **kwargs) -> int:
-        return eval(self.source, {}, kwargs)
+        variables = self.variables
+        return self.evaluator(variables)(*[kwargs[name] for name in variables])
+
+
+def rebuild(program: List[Tuple[type, tuple]]) -> Token:
+    # inverse of Token.__reduce__
+    tokens: List[Token] = []
+    for initializer, args in program:
+        tokens.append(initializer(*[arg if isinstance(arg, str) else tokens[arg]
+                                    for arg in args]))
+    return tokens[-1]
 
 
 class Variable(Token):
@@ -37,18 +216,23 @@ class Variable(Token):
     def display_text(self) -> str:
         return self.name
 
-    @property
-    def source(self) -> str:
+    def canonical(self) -> tuple:
+        return (Variable, self.name)
+
+    def key(self, operands: List[str]) -> str:
         return self.name
 
-    @property
-    def variables(self) -> List[str]:
-        return [self.name]
+    def display(self, operands: List[str]) -> str:
+        return self.name
 
-    def __eq__(self, __value) -> bool:
-        if isinstance(__value, Variable):
-            return self.name == __value.name
-        return False
+    def operation(self, operands: List[str], one: str = '1') -> str:
+        return self.name
+
+    def encode(self, cnf, operands: List[int]) -> int:
+        return cnf.variable(self.name)
+
+    def diagram(self, bdd, operands: List[int]) -> int:
+        return bdd.variable(self.name)
 
 
 class Negation(Token):
@@ -56,25 +240,26 @@ class Negation(Token):
         self.negated = negated
 
     @property
-    def display_text(self) -> str:
-        return f"¬{self.negated.display_text}"
+    def children(self) -> Tuple[Token, ...]:
+        return (self.negated,)
 
-    @property
-    def source(self) -> str:
-        return f"(1&~{self.negated.source})"
+    def canonical(self) -> tuple:
+        return (Negation, id(self.negated.canonical_token))
 
-    @property
-    def variables(self) -> List[str]:
-        return unique(self.negated.variables)
+    def key(self, operands: List[str]) -> str:
+        return f"~{operands[0]}"
 
-    @property
-    def sentences(self) -> List[Token]:
-        return self.negated.sentences + [self]
+    def display(self, operands: List[str]) -> str:
+        return f"¬{operands[0]}"
 
-    def __eq__(self, __value) -> bool:
-        if isinstance(__value, Negation):
-            return self.negated == __value.negated
-        return False
+    def operation(self, operands: List[str], one: str = '1') -> str:
+        return f"({one}&~{operands[0]})"
+
+    def encode(self, cnf, operands: List[int]) -> int:
+        return -operands[0]
+
+    def diagram(self, bdd, operands: List[int]) -> int:
+        return bdd.negate(operands[0])
 
 
 class BinaryExpression(Token):
@@ -84,16 +269,11 @@ class BinaryExpression(Token):
         self.right = right
 
     @property
-    def display_text(self) -> str:
-        return f"({self.left.display_text} {self.operator} {self.right.display_text})"
+    def children(self) -> Tuple[Token, ...]:
+        return (self.left, self.right)
 
-    @property
-    def variables(self) -> List[str]:
-        return unique(self.left.variables + self.right.variables)
-
-    @property
-    def sentences(self) -> List[Token]:
-        return self.left.sentences + self.right.sentences + [self]
+    def display(self, operands: List[str]) -> str:
+        return f"({operands[0]} {self.operator} {operands[1]})"
 
 
 class Implication(BinaryExpression):
@@ -102,14 +282,20 @@ class Implication(BinaryExpression):
     def __init__(self, left: Token, right: Token):
         super().__init__(Implication.symbol, left, right)
 
-    @property
-    def source(self) -> str:
-        return f"({self.left.source}^1|{self.right.source})"
+    def canonical(self) -> tuple:
+        return (Implication, id(self.left.canonical_token), id(self.right.canonical_token))
 
-    def __eq__(self, __value) -> bool:
-        if isinstance(__value, Implication):
-            return self.left == __value.left and self.right == __value.right
-        return False
+    def key(self, operands: List[str]) -> str:
+        return f">({operands[0]},{operands[1]})"
+
+    def operation(self, operands: List[str], one: str = '1') -> str:
+        return f"({operands[0]}^{one}|{operands[1]})"
+
+    def encode(self, cnf, operands: List[int]) -> int:
+        return cnf.disjunction([-operands[0], operands[1]])
+
+    def diagram(self, bdd, operands: List[int]) -> int:
+        return bdd.disjunction([bdd.negate(operands[0]), operands[1]])
 
 
 class Biconditional(BinaryExpression):
@@ -118,15 +304,22 @@ class Biconditional(BinaryExpression):
     def __init__(self, left: Token, right: Token):
         super().__init__(Biconditional.symbol, left, right)
 
-    @property
-    def source(self) -> str:
-        return f"({self.left.source}^1^{self.right.source})"
+    def canonical(self) -> tuple:
+        # symmetric
+        return (Biconditional, *sorted([id(self.left.canonical_token),
+                                        id(self.right.canonical_token)]))
 
-    def __eq__(self, __value) -> bool:
-        if isinstance(__value, Biconditional):
-            return (self.left == __value.left and self.right == __value.right) or \
-                (self.right == __value.left and self.left == __value.right)
-        return False
+    def key(self, operands: List[str]) -> str:
+        return f"=({','.join(sorted(operands))})"
+
+    def operation(self, operands: List[str], one: str = '1') -> str:
+        return f"({operands[0]}^{one}^{operands[1]})"
+
+    def encode(self, cnf, operands: List[int]) -> int:
+        return -cnf.xor(operands)
+
+    def diagram(self, bdd, operands: List[int]) -> int:
+        return bdd.negate(bdd.xor(operands))
 
 
 class NaryExpression(Token):
@@ -135,43 +328,37 @@ class NaryExpression(Token):
         self.symbol = symbol
         self.operands = args
 
-    def __eq__(self, __value) -> bool:
-        if type(self) is type(__value):
-            # NOTE: need a better solution, it grows exponentially for more operands
-            arrangments = permutations(
-                range(len(self.operands)), len(self.operands))
-            for arrangment in arrangments:
-                for index1, index2 in enumerate(arrangment):
-                    if self.operands[index1] != __value.operands[index2]:
-                        break
-                else:
-                    # found an equivalent arrangement
-                    return True
-        return False
-
     @property
-    def display_text(self) -> str:
-        symbol = f" {self.symbol} "
-        return f"({symbol.join([operand.display_text for operand in self.operands])})"
+    def children(self) -> Tuple[Token, ...]:
+        return self.operands
+
+    def canonical(self) -> tuple:
+        # commutative: sorted multiset of the operands' canonical tokens
+        # associative: operands of nested expressions of the same type are merged in,
+        # from their own canonical forms, already merged when they were built
+        # canonical tokens are kept alive by the operands, so their ids are stable
+        operands = []
+        for operand in self.operands:
+            if type(operand) is type(self):
+                operands += operand.canonical_form[1:]
+            else:
+                operands.append(id(operand.canonical_token))
+        return (type(self), *sorted(operands))
 
-    @property
-    def source(self) -> str:
-        sources = [operand.source for operand in self.operands]
-        return f"({self.operator.join(sources)})"
+    def key(self, operands: List[str]) -> str:
+        # operands are merged and sorted already, see Token.canonical_key
+        return f"{self.operator}({','.join(operands)})"
 
-    @property
-    def variables(self) -> List[str]:
-        all_variables = []
-        for operand in self.operands:
-            all_variables += operand.variables
-        return unique(all_variables)
+    def display(self, operands: List[str]) -> str:
+        symbol = f" {self.symbol} "
+        return f"({symbol.join(operands)})"
 
-    @property
-    def sentences(self) -> List[Token]:
-        all_sentences = []
-        for operand in self.operands:
-            all_sentences += operand.sentences
-        return all_sentences + [self]
+    def operation(self, operands: List[str], one: str = '1') -> str:
+        # group long chains so that python compiles them without deep recursion
+        while len(operands) > CHAIN_LIMIT:
+            operands = [f"({self.operator.join(operands[i:i + CHAIN_LIMIT])})"
+                        for i in range(0, len(operands), CHAIN_LIMIT)]
+        return f"({self.operator.join(operands)})"
 
 
 class Conjunction(NaryExpression):
@@ -181,6 +368,12 @@ class Conjunction(NaryExpression):
     def __init__(self, *args: List[Token]):
         super().__init__(Conjunction.operator, Conjunction.symbol, *args)
 
+    def encode(self, cnf, operands: List[int]) -> int:
+        return cnf.conjunction(operands)
+
+    def diagram(self, bdd, operands: List[int]) -> int:
+        return bdd.conjunction(operands)
+
 
 class Disjunction(NaryExpression):
     operator = '|'
@@ -189,6 +382,12 @@ class Disjunction(NaryExpression):
     def __init__(self, *args: List[Token]):
         super().__init__(Disjunction.operator, Disjunction.symbol, *args)
 
+    def encode(self, cnf, operands: List[int]) -> int:
+        return cnf.disjunction(operands)
+
+    def diagram(self, bdd, operands: List[int]) -> int:
+        return bdd.disjunction(operands)
+
 
 class XDisjunction(NaryExpression):
     operator = '^'
@@ -196,3 +395,9 @@ class XDisjunction(NaryExpression):
 
     def __init__(self, *args: List[Token]):
         super().__init__(XDisjunction.operator, XDisjunction.symbol, *args)
+
+    def encode(self, cnf, operands: List[int]) -> int:
+        return cnf.xor(operands)
+
+    def diagram(self, bdd, operands: List[int]) -> int:
+        return bdd.xor(operands)
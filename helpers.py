@@ -1,11 +1,28 @@
-from re import sub, match
-import csv
+from __future__ import annotations
+
+from re import compile as compile_pattern
+from functools import lru_cache
+from importlib import import_module
 from os import path
+from types import ModuleType
 
-from typing import List, Tuple
-from typing import Any
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Iterable, List, Optional, Tuple
 
 from constants import *
+from profiling import profiler
+
+
+@lru_cache(maxsize=None)
+def optional_module(name: str) -> Optional[ModuleType]:
+    # optional dependencies, imported on first use as they are slow to import:
+    # numpy (vectorized columns fall back to vanilla python, .npz files)
+    # and pyarrow.parquet (.parquet files)
+    try:
+        return import_module(name)
+    except ImportError:
+        return None
 
 
 # ===== stdout =====
@@ -50,48 +67,146 @@ def confirm(prompt: str) -> bool:
 # ===== Preprocessing =====
 
 
+# every operator alias, in matching order:
+# IFF before IMPLIES so that <-> doesn't get matched by ->
+# XOR before OR so that XOR doesn't get matched by OR
+OPERATOR_PATTERNS = {IFF_OP.strip(): IFF_PATTERNS,
+                     IMPLIES_OP.strip(): IMPLIES_PATTERNS,
+                     XOR_OP.strip(): XOR_PATTERNS,
+                     OR_OP.strip(): OR_PATTERNS,
+                     AND_OP.strip(): AND_PATTERNS,
+                     NOT_OP.strip(): NOT_PATTERNS}
+OPERATOR_GROUPS = {f"op{index}": operator
+                   for index, operator in enumerate(OPERATOR_PATTERNS)}
+
+# a single pattern for all lexemes, compiled once:
+# operators, parentheses, or names running up to the next operator
+LEXEME_PATTERN = compile_pattern('|'.join(
+    [f"(?P<{group}>{OPERATOR_PATTERNS[operator]})"
+     for group, operator in OPERATOR_GROUPS.items()] +
+    [r'[()]',
+     r'(?:\w+|(?!{})[^\s()])+'.format('|'.join(OPERATOR_PATTERNS.values()))]
+))
+
+
+@profiler.timed('normalize')
+def lex(s: str) -> List[Tuple[str, int]]:
+    # (lexeme, position) pairs in a single scan,
+    # with every operator alias mapped to its standard notation
+    return [(OPERATOR_GROUPS.get(match.lastgroup, match.group()), match.start())
+            for match in LEXEME_PATTERN.finditer(s)]
+
+
 def standardize_notations(s: str) -> str:
-    s = sub(AND_PATTERNS, AND_OP, s)
-    # matching XOR before OR
-    # so that XOR doesn't get matched by OR
-    s = sub(XOR_PATTERNS, XOR_OP, s)
-    s = sub(OR_PATTERNS, OR_OP, s)
-    # matching IFF before IMPLY
-    # so that <-> doesn't get matched by ->
-    s = sub(IFF_PATTERNS, IFF_OP, s)
-    s = sub(IMPLIES_PATTERNS, IMPLIES_OP, s)
-    # match NOT last so that spaces are properly added
-    s = sub(NOT_PATTERNS, NOT_OP, s)
+    lexemes = [lexeme for lexeme, _ in lex(s)]
+    # e.g. ( not a ) -> (not a)
+    return ' '.join(lexemes).replace('( ', '(').replace(' )', ')')
+
+
+# ===== Bit columns =====
+
+
+# a column packs the truth values of every row of a table into one integer:
+# bit i holds the value at row i
+
+
+def variable_columns(count: int) -> List[int]:
+    rows = 1 << count
+    columns: List[int] = []
+    for index in range(count):
+        # e.g. the first of 3 variables: 0 0 0 0 1 1 1 1
+        block = 1 << (count - 1 - index)
+        column, width = ((1 << block) - 1) << block, block << 1
+        # repeat the pattern until it fills all rows
+        while width < rows:
+            column |= column << width
+            width <<= 1
+        columns.append(column)
+    return columns
+
+
+def spread_column(column: int, count: int) -> int:
+    # a column over count variables as a column over one more, the new one last,
+    # i.e. row r is repeated as rows 2r and 2r + 1
+    rows = 1 << count
+    mask = (1 << (rows << 1)) - 1
+    patterns = variable_columns(count + 1)
+    # move bit r to bit 2r, halving the distance moved at each step:
+    # blocks of 2^k bits are kept, the ones in between are cleared
+    for index in range(1, count + 1):
+        column = (column | column << (1 << (count - index))) & (mask ^ patterns[index])
+    return column | column << 1
+
+
+def array_columns(count: int) -> List[Any]:
+    # numpy counterpart of variable_columns: one boolean array per variable
+    numpy = optional_module('numpy')
+    rows = 1 << count
+    columns = []
+    for index in range(count):
+        block = 1 << (count - 1 - index)
+        pattern = numpy.repeat(numpy.array([False, True]), block)
+        columns.append(numpy.tile(pattern, rows // (block << 1)))
+    return columns
+
+
+def pack_array(column: Any) -> int:
+    # boolean array column as a packed integer column
+    numpy = optional_module('numpy')
+    return int.from_bytes(numpy.packbits(column, bitorder='little').tobytes(), 'little')
 
-    s = sub(r'\s+', ' ', s)
 
-    # handle cases: ( not ...
-    s = sub(r'\(\s+not', '(not', s)
+def join_columns(parts: List[int], width: int) -> int:
+    # concatenate packed columns of consecutive chunks of rows,
+    # all but the last one being exactly width rows long
+    if width % 8 == 0:
+        return int.from_bytes(b''.join(part.to_bytes(width // 8, 'little') for part in parts),
+                              'little')
+    return int(''.join(format(part, f'0{width}b') for part in reversed(parts)), 2)
 
-    return s
 
+def first_set(column: int | Any) -> Optional[int]:
+    # index of the first row that is true, if any
+    if not isinstance(column, int):
+        # boolean array
+        return int(column.argmax()) if column.any() else None
+    if column == 0:
+        return None
+    # isolate the lowest set bit
+    return (column & -column).bit_length() - 1
 
-def parse(s: str) -> list:
-    # for each component: add quotes and separate by ,
-    s = sub(r'([^\s()]+\b|[^\w\s()]+\B)',
-            r'"\1",',
-            s)
-    # convert () to python list notation [[...],]
-    s = s.replace('(', '[')
-    s = sub(r'\)(?!$)', '],', s)
-    s = s.replace(')', ']')  # last ) should not end in ,
 
-    struct = list(eval(s))
-    return struct
+def all_set(column: int | Any, mask: int | Any) -> bool:
+    # whether a packed integer or boolean array column is all ones
+    if not isinstance(column, int):
+        return bool(column.all())
+    return column == mask
+
+
+def count_set(column: int | Any) -> int:
+    # number of rows that are true
+    if not isinstance(column, int):
+        return int(column.sum())
+    return bin(column).count('1')
+
+
+def column_key(column: int | Any) -> int | bytes:
+    # hashable truth vector of a packed integer or boolean array column
+    if not isinstance(column, int):
+        return optional_module('numpy').packbits(column).tobytes()
+    return column
 
 
 # ===== Miscellaneous =====
 
 
 # NOTE: temporary solution to removing parentheses
+OUTER_PARENTHESES = compile_pattern(r'^\(([\s\S]*)\)$')
+
+
 def display(token) -> str:
     # '(a V b)' -> 'a V b'
-    return sub(r'^\(([\s\S]*)\)$', r'\1', str(token))
+    return OUTER_PARENTHESES.sub(r'\1', str(token))
 
 
 # https://stackoverflow.com/questions/1653970/does-python-have-an-ordered-set
@@ -102,99 +217,263 @@ def unique(seq: List | Tuple) -> List:
 # determine if a variable name conforms to the rules
 
 
+# 1. begins with a-z, A-Z or _ (underscore)
+# 2. contains only a-z, A-Z, 0-9 or _
+# 3. does not contain any spaces
+NAME_PATTERN = compile_pattern(r'^[a-zA-Z_]\w*$')
+
+
 def good_name(name: str) -> bool:
-    # 1. begins with a-z, A-Z or _ (underscore)
-    # 2. contains only a-z, A-Z, 0-9 or _
-    # 3. does not contain any spaces
-    pattern = r'^[a-zA-Z_]\w*$'
-    return bool(match(pattern, name))
+    return bool(NAME_PATTERN.match(name))
 
 
 # process new file name
 
 
-def preprocess_filename(filepath: str) -> str:
+def table_format(filepath: str) -> str:
+    # file format by extension, csv by default
+    extension = path.splitext(filepath)[1].lower()
+    return extension if extension in TABLE_FORMATS else TABLE_FORMATS[0]
+
+
+def check_table_format(filepath: str) -> str:
+    # table_format, asserting that the library it needs (if any) is installed
+    extension = table_format(filepath)
+    if extension in TABLE_LIBRARIES:
+        library, module = TABLE_LIBRARIES[extension]
+        assert optional_module(module) is not None, MISSING_LIBRARY.format(library, extension)
+    return extension
+
+
+def preprocess_filename(filepath: str, extension: Optional[str] = None) -> str:
+    # extension: file format, detected from the file path if not given
     filepath = filepath.strip()
 
     if path.isdir(filepath):
-        filepath = path.join(filepath, 'output.csv')
+        filepath = path.join(filepath, 'output' + (extension or TABLE_FORMATS[0]))
 
-    # add extension if no extension is provided
-    if not filepath.endswith('.csv'):
-        filepath += '.csv'
+    # add extension if no known extension is provided
+    extension = extension or table_format(filepath)
+    if path.splitext(filepath)[1].lower() != extension:
+        filepath += extension
 
     # convert to absolute path, resolving ./../~/symlinks
     # also expanding environment variable e.g. $HOME
     filepath = path.realpath(path.expanduser(path.expandvars(filepath)))
 
     # change file name if file path exists
+    stem = filepath[:-len(extension)]
     counter = 1
     while path.exists(filepath):
-        filepath = f"{filepath[:-4]}-{counter}.csv"
+        filepath = f"{stem}-{counter}{extension}"
         counter += 1
 
     return filepath
 
 
+# packed truth table files: every column is stored as is, ceil(rows / 8) bytes each,
+# where bit i of byte j holds the value at row 8j + i
+# .ltt:     magic, metadata length (4 bytes, little endian), metadata (JSON),
+#           zero padding up to a multiple of 8 bytes, then the columns back to back
+# .npz:     variables, sentences and a (columns, bytes) matrix of uint8
+# .parquet: one boolean column per variable/sentence, the variable names in
+#           the schema metadata
+
+
+def table_metadata(variables: List[str], sentences: List[str], rows: int) -> bytes:
+    # everything in a .ltt file before the columns
+    import json
+    metadata = json.dumps({'variables': variables, 'sentences': sentences, 'rows': rows},
+                          ensure_ascii=False).encode()
+    header = TABLE_MAGIC + len(metadata).to_bytes(4, 'little') + metadata
+    return header + bytes(-len(header) % 8)
+
+
+def create_columns(filepath: str, variables: List[str], sentences: List[str], rows: int):
+    # a .ltt file of zeroed columns, to be filled in place through map_columns
+    metadata = table_metadata(variables, sentences, rows)
+    with open(filepath, 'wb') as file:
+        file.write(metadata)
+        # sparse on most file systems until written
+        file.truncate(len(metadata) + (len(variables) + len(sentences)) * ((rows + 7) // 8))
+
+
+def map_columns(filepath: str, writable: bool = False) -> Tuple[List[str], List[str],
+                                                                List[memoryview], int]:
+    # variables, sentences, columns and row count of a .ltt file,
+    # columns are views of the mapped file, paged in on access
+    import json
+    import mmap
+    with open(filepath, 'r+b' if writable else 'rb') as file:
+        data = memoryview(mmap.mmap(file.fileno(), 0,
+                                    access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ))
+    assert data[:len(TABLE_MAGIC)] == TABLE_MAGIC, TABLE_FILE_ERROR.format(filepath)
+    start = len(TABLE_MAGIC) + 4
+    end = start + int.from_bytes(data[start - 4:start], 'little')
+    metadata = json.loads(bytes(data[start:end]))
+    variables, sentences, rows = metadata['variables'], metadata['sentences'], metadata['rows']
+    start = end + (-end % 8)
+    size = (rows + 7) // 8
+    columns = [data[start + i * size:start + (i + 1) * size]
+               for i in range(len(variables) + len(sentences))]
+    return variables, sentences, columns, rows
+
+
+def write_columns(filepath: str, variables: List[str], sentences: List[str],
+                  columns: List[bytes], rows: int):
+    extension = check_table_format(filepath)
+    if extension == '.ltt':
+        with open(filepath, 'wb') as file:
+            file.write(table_metadata(variables, sentences, rows))
+            for column in columns:
+                file.write(column)
+    elif extension == '.npz':
+        numpy = optional_module('numpy')
+        matrix = numpy.frombuffer(b''.join(columns), dtype=numpy.uint8)
+        numpy.savez(filepath, variables=numpy.array(variables, dtype=str),
+                    sentences=numpy.array(sentences, dtype=str),
+                    columns=matrix.reshape(len(columns), (rows + 7) // 8))
+    elif extension == '.parquet':
+        pyarrow, parquet = optional_module('pyarrow'), optional_module('pyarrow.parquet')
+        import json
+        # arrow booleans are bit-packed the same way, so columns are not copied
+        arrays = [pyarrow.Array.from_buffers(pyarrow.bool_(), rows, [None, pyarrow.py_buffer(column)])
+                  for column in columns]
+        schema = pyarrow.schema([(name, pyarrow.bool_()) for name in variables + sentences],
+                                metadata={'variables': json.dumps(variables)})
+        parquet.write_table(pyarrow.Table.from_arrays(arrays, schema=schema), filepath)
+    else:
+        raise Exception(UNEXPECTED_ERROR)
+
+
+def read_columns(filepath: str,
+                 labels: str | None = None) -> Tuple[List[str], List[str], List[bytes | memoryview], int]:
+    # variables, sentences, columns and row count of a truth table file,
+    # labels being the custom labels of a csv file, if any
+    extension = check_table_format(filepath)
+    if extension == '.ltt':
+        # mapped rather than read
+        return map_columns(filepath)
+    elif extension == '.npz':
+        numpy = optional_module('numpy')
+        with numpy.load(filepath) as data:
+            variables, sentences = data['variables'].tolist(), data['sentences'].tolist()
+            columns = [column.tobytes() for column in data['columns']]
+        return variables, sentences, columns, 1 << len(variables)
+    elif extension == '.parquet':
+        pyarrow, parquet = optional_module('pyarrow'), optional_module('pyarrow.parquet')
+        import json
+        table = parquet.read_table(filepath)
+        variables = json.loads(table.schema.metadata[b'variables'])
+        sentences = table.column_names[len(variables):]
+        rows = table.num_rows
+        columns = []
+        for column in table.columns:
+            column = column.combine_chunks()
+            # realign the bits, in case the array is a slice
+            if column.offset:
+                column = pyarrow.concat_arrays([column])
+            columns.append(column.buffers()[1].to_pybytes()[:(rows + 7) // 8])
+        return variables, sentences, columns, rows
+    # csv: header, then one row per line
+    import csv
+    with open(filepath, newline='') as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader)
+        cells = list(zip(*reader))
+    rows = len(cells[0]) if cells else 0
+    values = {'0': '0', '1': '1'}
+    if isinstance(labels, str):
+        values = {labels[0]: '0', labels[1]: '1'}
+    # variables come first, and there are log2(rows) of them
+    count = rows.bit_length() - 1
+    columns = [int(''.join(values[cell] for cell in reversed(column)), 2)
+               .to_bytes((rows + 7) // 8, 'little')
+               for column in cells]
+    return header[:count], header[count:], columns, rows
+
+
 # output a table via either stdout or csv
 
 
-def output_table(table: List[List[Any]],
+def output_table(table: List[List[Any]] | Any,
                  labels: str | None = None,
                  filepath: str | None = None):
+    # a list of rows with the header first, or a truth table
+    if isinstance(table, list):
+        header, rows = table[0], table[1:]
+    else:
+        header, rows = table.header, table
+    if filepath and table_format(filepath) != '.csv':
+        # packed formats store the columns as is, without marks and labels
+        assert not isinstance(table, list), TABLE_EXPORT_ERROR.format(table_format(filepath))
+        table.save(preprocess_filename(filepath))
+        return
+    write_table(header, rows, labels=labels, filepath=filepath,
+                measure=isinstance(table, list))
+
+
+@profiler.timed('render')
+def write_table(header: List[str],
+                rows: Iterable[Iterable[Any]],
+                labels: str | None = None,
+                filepath: str | None = None,
+                measure: bool = False):
+    # stream rows (e.g. from a generator) to stdout or csv,
+    # holding a single row at a time
+    relabel = lambda cell: cell
     if isinstance(labels, str):
         # prepare custom labels
         assert len(labels) == 2, CUSTOM_LABEL_LENGTH_ERROR
         assert labels[0] != labels[1], CUSTOM_LABEL_IDENTICAL_ERROR
-        table = [
-            [labels[cell] if cell in [0, 1] else cell for cell in row]
-            for row in table
-        ]
-    
-    header = table[0]
+        relabel = lambda cell: labels[cell] if cell in [0, 1] else cell
 
     if filepath:
         # write to csv file
         filepath = preprocess_filename(filepath)
 
-        if MARK_COLUMN in header:
-            # remove mark column
-            table = [row[:-1] for row in table]
+        # remove mark column
+        end = -1 if MARK_COLUMN in header else None
 
-        with open(filepath, 'w') as csv_file:
+        import csv
+        with profiler.phase('csv'), open(filepath, 'w', buffering=CSV_BUFFER_SIZE) as csv_file:
             writer = csv.writer(csv_file)
+            writer.writerow(header[:end])
             # write body
-            for row in table:
-                writer.writerow(row)
-    else:
-        col_widths: List[int] = []
-        # get lengthiest string per column as its width
-        for i in range(len(header)):
-            if header[i] == MARK_COLUMN:
-                col_widths.append(3)
-            else:
-                col_lengths = [len(str(row[i])) for row in table]
-                col_widths.append(max(col_lengths) + 2)
-
-        # create row templates
-        row_template, row_separator, border = [], [], []
-        for width in col_widths:
-            border.append(BOX_OUTER_HLINE * width)
-            row_template.append('{:^' + str(width) + '}')
-            row_separator.append(BOX_INNER_HLINE * width)
-
-        # create top/bottom borders
-        top_border = f"{BOX_TOP_LEFT}{BOX_TOP_T.join(border)}{BOX_TOP_RIGHT}"
-        bottom_border = f"{BOX_BOTTOM_LEFT}{BOX_BOTTOM_T.join(border)}{BOX_BOTTOM_RIGHT}"
-
-        # create row separator and separator
-        row_separator = f"\n{BOX_LEFT_T}{BOX_JOINT.join(row_separator)}{BOX_RIGHT_T}\n"
-        row_template = f"{BOX_OUTER_VLINE}{BOX_INNER_VLINE.join(row_template)}{BOX_OUTER_VLINE}"
-
-        rows = []
-        for row in table:
-            rows.append(row_template.format(*row))
-
-        print(top_border)
-        print(row_separator.join(rows))
-        print(bottom_border)
+            writer.writerows([relabel(cell) for cell in row][:end] for row in rows)
+        return
+
+    col_widths: List[int] = []
+    for i in range(len(header)):
+        if header[i] == MARK_COLUMN:
+            col_widths.append(3)
+        elif measure:
+            # get lengthiest string per column as its width
+            col_lengths = [len(str(header[i]))] + [len(str(relabel(row[i]))) for row in rows]
+            col_widths.append(max(col_lengths) + 2)
+        else:
+            # truth values: the header or a label is the lengthiest
+            col_widths.append(max(len(str(header[i])), 1) + 2)
+
+    # create row templates
+    row_template, row_separator, border = [], [], []
+    for width in col_widths:
+        border.append(BOX_OUTER_HLINE * width)
+        row_template.append('{:^' + str(width) + '}')
+        row_separator.append(BOX_INNER_HLINE * width)
+
+    # create top/bottom borders
+    top_border = f"{BOX_TOP_LEFT}{BOX_TOP_T.join(border)}{BOX_TOP_RIGHT}"
+    bottom_border = f"{BOX_BOTTOM_LEFT}{BOX_BOTTOM_T.join(border)}{BOX_BOTTOM_RIGHT}"
+
+    # create row separator and separator
+    row_separator = f"{BOX_LEFT_T}{BOX_JOINT.join(row_separator)}{BOX_RIGHT_T}"
+    row_template = f"{BOX_OUTER_VLINE}{BOX_INNER_VLINE.join(row_template)}{BOX_OUTER_VLINE}"
+
+    # print rows as they come
+    print(top_border)
+    print(row_template.format(*header))
+    for row in rows:
+        print(row_separator)
+        print(row_template.format(*[relabel(cell) for cell in row]))
+    print(bottom_border)
@@ -0,0 +1,74 @@
+import json
+
+from typing import Any, Dict
+
+from constants import *
+from helpers import display
+from objects import Argument, Config, Proposition
+
+
+def load_job(line: str) -> Any:
+    # JSON object/array/string, or semicolon-separated statements
+    if line[0] in '{["':
+        return json.loads(line)
+    return [s.strip() for s in line.split(';')]
+
+
+def read_job(line: str, command: str = JOB_COMMANDS[0]) -> Dict[str, Any]:
+    return make_job(load_job(line), command)
+
+
+def make_job(job: Any, command: str = JOB_COMMANDS[0]) -> Dict[str, Any]:
+    # a job object from a JSON value, command being the one for jobs without a "command" key
+    if isinstance(job, str):
+        job = [job]
+    if isinstance(job, list):
+        job = {'statements': job}
+    assert isinstance(job, dict), BAD_JOB
+    command = job.get('command', command)
+    statements = job.get('statements', [])
+    if command == 'make-table':
+        job.setdefault('statement', statements[0] if statements else '')
+    elif command == 'check-validity' and 'premises' not in job:
+        assert len(statements) > 0, 'An argument needs at least 1 premise and 1 conclusion.'
+        # take last statement as conclusion
+        job['premises'], job['conclusion'] = statements[:-1], statements[-1]
+    missing = [f"'{key}'" for key in JOB_KEYS.get(command, []) if key not in job]
+    assert not missing, MISSING_JOB_KEYS.format(command, ' and '.join(missing))
+    job['command'] = command
+    return job
+
+
+def run_job(job: Dict[str, Any], config: Config) -> Dict[str, Any]:
+    command = job['command']
+    if command == 'make-table':
+        statement = Proposition(job['statement'], config=config)
+        table = statement.truth_table
+        return {'statement': display(statement),
+                'header': table.header,
+                'rows': [list(row) for row in table]}
+    elif command == 'check-equivalence':
+        statements = [Proposition(s) for s in job['statements']]
+        assert len(statements) > 1, 'At least 2 sentences are required.'
+        return {'statements': [display(s) for s in statements],
+                'equivalent': Argument(statements, config=config).test_equivalence()}
+    elif command == 'check-validity':
+        assert len(job['premises']) > 0, \
+            'An argument needs at least 1 premise and 1 conclusion.'
+        premises = [Proposition(p) for p in job['premises']]
+        conclusion = Proposition(job['conclusion'])
+        argument = Argument(premises, conclusion, config=config)
+        countermodel = argument.find_countermodel()
+        return {'premises': [display(p) for p in premises],
+                'conclusion': display(conclusion),
+                'valid': countermodel is None,
+                'countermodel': countermodel}
+    raise Exception(UNKNOWN_COMMAND.format(command))
+
+
+def answer_job(job: Dict[str, Any], config: Config) -> Dict[str, Any]:
+    # result of a job, or its error
+    try:
+        return run_job(job, config)
+    except Exception as err:
+        return {'error': str(err)}
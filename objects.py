@@ -1,11 +1,32 @@
-from itertools import product, combinations
-from functools import cached_property
+from __future__ import annotations
 
-from typing import List, Optional, Literal
+from itertools import combinations
+from functools import cached_property, lru_cache, wraps
+from os import cpu_count
 
 from constants import *
-from helpers import *
-from fol import *
+from helpers import (all_set, array_columns, bold, column_key, count_set, create_columns,
+                     display, first_set, green, join_columns, map_columns, optional_module,
+                     output_table, pack_array, preprocess_filename, red, spread_column,
+                     unique, variable_columns, yellow)
+from fol import Negation, Token, Variable
+from parsing import parse
+from cache import LRUCache
+from profiling import profiler
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    # annotations aren't evaluated (see the __future__ import),
+    # so typing is left to type checkers: it's slow to import too
+    from typing import Any, Callable, Dict, Iterator, List, Optional, Literal, Tuple
+    # multiprocessing and concurrent.futures are imported on first use,
+    # as they are slow to import and most runs don't need them,
+    # and so are the SAT solver, decision diagrams, the result cache
+    # and truth tables, which checks past the SAT threshold don't draw
+    from concurrent.futures import Executor, Future
+    from multiprocessing.context import BaseContext
+    from bdd import BDD
+    from table import TruthTable
 
 class Config:
     def __init__(self,
@@ -13,17 +34,426 @@ class Config:
                  labels: Optional[str] = None,
                  atoms: bool = True,
                  log_countermodel: bool = False,
+                 engine: Literal['rows', 'bitwise', 'numpy', 'bdd'] = 'bitwise',
+                 sat_threshold: int = SAT_THRESHOLD,
+                 workers: int = 1,
+                 spill: Optional[str] = None,
+                 cache: Optional[str] = None,
+                 cache_size: int = CACHE_SIZE,
+                 profile: bool = False,
                  **kwargs):
         self.reverse = reverse
         self.labels = labels
         self.atoms = atoms
         self.log_countermodel = log_countermodel
+        # rows: evaluate row by row
+        # bitwise: evaluate whole columns packed into integers
+        # numpy: evaluate whole columns as boolean arrays
+        # bdd: answer checks with binary decision diagrams, tables are drawn bitwise
+        if engine == 'numpy' and optional_module('numpy') is None:
+            # numpy is optional, fall back to vanilla python
+            engine = 'bitwise'
+        self.engine = engine
+        # check validity/equivalence with the SAT solver past this many variables
+        self.sat_threshold = sat_threshold
+        # processes evaluating large tables in shards, 0 for all cores
+        self.workers = workers or cpu_count() or 1
+        # .ltt file path (or directory) truth tables are evaluated into,
+        # memory-mapped rather than held in memory
+        self.spill = spill
+        # directory of the persistent result cache, None to disable it
+        self.cache = cache
+        self.cache_size = cache_size
+        # record timings and counts in profiling.profiler, for the whole process
+        self.profile = profile
+        if profile:
+            profiler.enable()
         # extra keyword arguments in kwargs are not used temporarily
 
     def __repr__(self) -> str:
         return str(self.__dict__)
 
 
+@profiler.timed('evaluate')
+def truth_columns(variables: List[str], tokens: List[Token],
+                  config: Config) -> Tuple[int, List[int]]:
+    if config.engine == 'numpy':
+        # True broadcasts as the all-ones column
+        mask = optional_module('numpy').True_
+        columns = array_columns(len(variables))
+    else:
+        # all-ones column, i.e. a tautology
+        mask = (1 << (1 << len(variables))) - 1
+        columns = variable_columns(len(variables))
+    if config.reverse:
+        # reversing the rows complements every variable column
+        columns = [column ^ mask for column in columns]
+    profiler.count('rows', 1 << len(variables))
+    # a handful of bitwise operations per node for the whole table
+    values = [token.evaluator(variables, bitwise=True)(mask, *columns)
+              for token in tokens]
+    return mask, columns + values
+
+
+def chunk_columns(variables: List[str], tokens: List[Token], config: Config,
+                  start: int = 0, stop: Optional[int] = None) -> List[int]:
+    # packed columns of the given chunks of a table, one per token
+    width = 1 << chunk_width(variables, config)
+    parts: List[List[int]] = [[] for _ in tokens]
+    for _, _, columns in truth_chunks(variables, tokens, config, start, stop):
+        for part, column in zip(parts, columns):
+            part.append(column if isinstance(column, int) else pack_array(column))
+    return [join_columns(part, width) for part in parts]
+
+
+# (token, variables, reversed) -> packed column of a whole table,
+# shared by all the sentences evaluated in the process
+column_memo = LRUCache(MEMO_SIZE, MEMO_OVERHEAD)
+
+
+def memoizable(variables: List[str], config: Config) -> bool:
+    # tables evaluated whole, in a single chunk
+    return config.engine in MEMO_ENGINES and len(variables) <= CHUNK_VARIABLES
+
+
+@profiler.timed('evaluate')
+def memo_columns(variables: List[str], tokens: List[Token],
+                 config: Config) -> List[int]:
+    # packed columns of the whole table, one per token, evaluated a token at a time
+    # so that the columns of common subformulas (up to commutativity/associativity)
+    # are computed once for all tokens, and reused by later tables over the same variables
+    context = (tuple(variables), config.reverse)
+    mask = (1 << (1 << len(variables))) - 1
+    size = ((1 << len(variables)) + 7) // 8
+    # id(token) -> column
+    columns: Dict[int, int] = {}
+    # kept alive so that their ids stay theirs
+    leaves = [Variable(name) for name in variables]
+    # whether any column was computed rather than found in the memo
+    evaluated = False
+    for leaf, column in zip(leaves, variable_columns(len(variables))):
+        columns[id(leaf)] = column ^ mask if config.reverse else column
+    for token in tokens:
+        if id(token) in columns:
+            continue
+        column = column_memo.get((token, context))
+        if column is not None:
+            columns[id(token)] = column
+            continue
+        for node in token.postorder():
+            if id(node) in columns:
+                continue
+            column = column_memo.get((node, context))
+            if column is None:
+                column = node.gate()(mask, *[columns[id(child)] for child in node.children])
+                column_memo.put((node, context), column, size)
+                evaluated = True
+            columns[id(node)] = column
+    if evaluated:
+        profiler.count('rows', 1 << len(variables))
+    return [columns[id(token)] for token in tokens]
+
+
+def table_columns(variables: List[str], tokens: List[Token],
+                  config: Config) -> List[int]:
+    # packed columns of the whole table, variable columns included
+    tokens = [Variable(variable) for variable in variables] + tokens
+    if memoizable(variables, config):
+        return memo_columns(variables, tokens, config)
+    ranges = shards(variables, config)
+    if len(ranges) == 1:
+        return chunk_columns(variables, tokens, config)
+    # shards come back in table order
+    with process_pool(config.workers) as executor:
+        futures = [executor.submit(chunk_columns, variables, tokens, config, start, stop)
+                   for start, stop in ranges]
+        parts = [future.result() for future in futures]
+    start, stop = ranges[0]
+    width = (stop - start) << chunk_width(variables, config)
+    return [join_columns(list(column), width) for column in zip(*parts)]
+
+
+def chunk_width(variables: List[str], config: Config) -> int:
+    # number of trailing variables varying within a chunk,
+    # the rows engine goes row by row, i.e. chunks of a single row
+    return 0 if config.engine == 'rows' else min(len(variables), CHUNK_VARIABLES)
+
+
+def truth_chunks(variables: List[str], tokens: List[Token], config: Config,
+                 start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[Callable[[int], List[int]],
+                                                                              int | Any, List[int | Any]]]:
+    # lazily evaluate a table in chunks of rows, in table order:
+    # the leading variables are fixed per chunk, the trailing ones vary
+    # within the chunk's columns, so memory is bounded by the chunk size
+    # chunk i fixes the leading variables to the binary digits of i
+    count = len(variables)
+    low = chunk_width(variables, config)
+    high = count - low
+    if config.engine == 'numpy':
+        numpy = optional_module('numpy')
+        mask = numpy.True_
+        columns = array_columns(low)
+        fixed = [numpy.zeros(1 << low, dtype=bool), numpy.ones(1 << low, dtype=bool)]
+    else:
+        mask = (1 << (1 << low)) - 1
+        columns = variable_columns(low)
+        fixed = [0, mask]
+    if config.reverse:
+        columns = [column ^ mask for column in columns]
+    evaluators = [token.evaluator(variables, bitwise=True) for token in tokens]
+
+    for chunk in range(start, 1 << high if stop is None else stop):
+        # reversed order: 1 1 1 ... 0 0 0
+        prefix = [(chunk >> (high - 1 - i) & 1) ^ config.reverse for i in range(high)]
+
+        def assignment(index: int, prefix: List[int] = prefix) -> List[int]:
+            # variable values at the given row of the chunk
+            return prefix + [(index >> (low - 1 - i) & 1) ^ config.reverse
+                             for i in range(low)]
+        values = [fixed[value] for value in prefix] + columns
+        with profiler.phase('evaluate'):
+            profiler.count('rows', 1 << low)
+            values = [evaluate(mask, *values) for evaluate in evaluators]
+        yield assignment, mask, values
+
+
+@lru_cache(maxsize=None)
+def fork_context() -> Optional['BaseContext']:
+    # workers are forked so that they don't re-run the command line script,
+    # tables are evaluated serially on platforms that can't fork
+    from multiprocessing import get_all_start_methods, get_context
+    return get_context('fork') if 'fork' in get_all_start_methods() else None
+
+
+def process_pool(workers: int, initializer: Optional[Callable[..., None]] = None,
+                 initargs: tuple = ()) -> 'Executor':
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(workers, mp_context=fork_context(),
+                               initializer=initializer, initargs=initargs)
+
+
+def shards(variables: List[str], config: Config,
+           workers: Optional[int] = None, align: int = 1) -> List[Tuple[int, int]]:
+    # contiguous ranges of chunks, i.e. of leading variable prefixes,
+    # a few per worker so that the load is balanced and can be cancelled early
+    # align: ranges start at multiples of this many chunks
+    count = 1 << (len(variables) - chunk_width(variables, config))
+    workers = config.workers if workers is None else workers
+    if workers <= 1 or count == 1 or fork_context() is None:
+        return [(0, count)]
+    size = -(-count // (workers * 4))
+    size = -(-size // align) * align
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def fill_columns(filepath: str, variables: List[str], tokens: List[Token],
+                 config: Config, start: int, stop: int):
+    # evaluate the given chunks of a table straight into a .ltt file,
+    # a byte-aligned block of chunks at a time
+    _, _, columns, _ = map_columns(filepath, writable=True)
+    width = 1 << chunk_width(variables, config)
+    group = max(1, 8 // width)
+    for block in range(start, stop, group):
+        end = min(block + group, stop)
+        offset, size = block * width // 8, ((end - block) * width + 7) // 8
+        parts = chunk_columns(variables, tokens, config, block, end)
+        for column, part in zip(columns, parts):
+            column[offset:offset + size] = part.to_bytes(size, 'little')
+
+
+def spill_table(filepath: str, variables: List[str], sentences: List[Token],
+                config: Config) -> 'TruthTable':
+    # evaluate a table into a memory-mapped .ltt file, chunk by chunk,
+    # so that only a chunk per worker is ever held in memory
+    create_columns(filepath, variables, [display(s) for s in sentences], 1 << len(variables))
+    tokens = [Variable(variable) for variable in variables] + sentences
+    # shards don't share bytes
+    ranges = shards(variables, config, align=max(1, 8 >> chunk_width(variables, config)))
+    if len(ranges) == 1:
+        fill_columns(filepath, variables, tokens, config, *ranges[0])
+    else:
+        with process_pool(config.workers) as executor:
+            futures = [executor.submit(fill_columns, filepath, variables, tokens, config, start, stop)
+                       for start, stop in ranges]
+            for future in futures:
+                future.result()
+    from table import load_table
+    return load_table(filepath)
+
+
+def row_model(variables: List[str], index: int, config: Config) -> Dict[str, int]:
+    # variable -> value of a row of the whole table
+    count = len(variables)
+    return {var: (index >> (count - 1 - i) & 1) ^ config.reverse
+            for i, var in enumerate(variables)}
+
+
+# index of the earliest shard known to have a countermodel, shared by the
+# workers of a search (see search_countermodel), None outside of them
+found_shard: Any = None
+
+
+def share_found_shard(value: Any):
+    # worker initializer: inherited when the worker is forked
+    global found_shard
+    found_shard = value
+
+
+def first_countermodel(variables: List[str], premises: List[Token], conclusion: Token,
+                       config: Config, start: int = 0, stop: Optional[int] = None,
+                       shard: Optional[int] = None) -> Optional[List[int]]:
+    # values of the first row of the given chunks
+    # where all premises are true and the conclusion is false,
+    # shard: index of the chunks in a parallel search, which gives up
+    # (None) as soon as an earlier shard has found one
+    tokens = premises + [conclusion]
+    shared = shard is not None and found_shard is not None
+    for assignment, mask, columns in truth_chunks(variables, tokens, config, start, stop):
+        if shared and found_shard.value < shard:
+            return None
+        *premises, conclusion = columns
+        countermodels = conclusion ^ mask
+        for premise in premises:
+            countermodels = countermodels & premise
+        index = first_set(countermodels)
+        if index is not None:
+            if shared:
+                with found_shard.get_lock():
+                    found_shard.value = min(found_shard.value, shard)
+            return assignment(index)
+    return None
+
+
+def search_countermodel(variables: List[str], premises: List[Token], conclusion: Token,
+                        config: Config, workers: Optional[int] = None) -> Optional[List[int]]:
+    # first countermodel in table order, if any
+    workers = config.workers if workers is None else workers
+    ranges = shards(variables, config, workers)
+    if len(ranges) == 1:
+        return first_countermodel(variables, premises, conclusion, config)
+    from concurrent.futures import as_completed
+    # pending shards are cancelled, running ones stop at their next chunk
+    # once an earlier shard has found a countermodel (their None is then moot)
+    found_shard = fork_context().Value('q', len(ranges))
+    executor = process_pool(workers, share_found_shard, (found_shard,))
+    futures = [executor.submit(first_countermodel, variables, premises, conclusion,
+                               config, start, stop, shard)
+               for shard, (start, stop) in enumerate(ranges)]
+    # shard index -> countermodel, None if it has none
+    found: Dict[int, Optional[List[int]]] = {}
+    try:
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            index = futures.index(future)
+            found[index] = future.result()
+            if found[index] is not None:
+                # later shards can't have an earlier countermodel
+                for later in futures[index + 1:]:
+                    later.cancel()
+            # the first shard in table order that isn't known to have none
+            first = 0
+            while first in found and found[first] is None:
+                first += 1
+            if first in found:
+                return found[first]
+        return None
+    finally:
+        # every shard still running stops at its next chunk, and is waited for:
+        # the shared value's memory is reused by the next search once it's freed
+        found_shard.value = -1
+        executor.shutdown(cancel_futures=True)
+
+
+def remembered(key: Callable[..., Optional[List[str]]]):
+    # methods whose (JSON) results are looked up in the result cache first,
+    # key: parts of the cache key of a call, None if it isn't to be cached,
+    # called with the same arguments as the method (e.g. workers=...)
+    def decorator(method: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs) -> Any:
+            parts = key(self, *args, **kwargs) if self.config.cache else None
+            if parts is None:
+                return method(self, *args, **kwargs)
+            import json
+            from cache import digest, open_cache
+            cache = open_cache(self.config.cache, self.config.cache_size)
+            digested = digest(*parts)
+            value = cache.get(digested)
+            if value is not None:
+                return json.loads(value)
+            result = method(self, *args, **kwargs)
+            cache.put(digested, json.dumps(result).encode())
+            return result
+        return wrapper
+    return decorator
+
+
+def cached_columns(variables: List[str], tokens: List[Token],
+                   config: Config) -> List[int]:
+    # table_columns, looked up in the result cache first if the table is small enough
+    if not config.cache or len(variables) > CACHE_VARIABLES:
+        return table_columns(variables, tokens, config)
+    from cache import digest, open_cache
+    cache = open_cache(config.cache, config.cache_size)
+    key = digest('columns', ' '.join(variables), str(int(config.reverse)),
+                 *[token.canonical_key for token in tokens])
+    size = ((1 << len(variables)) + 7) // 8
+    value = cache.get(key)
+    if value is None:
+        columns = table_columns(variables, tokens, config)
+        cache.put(key, b''.join(column.to_bytes(size, 'little') for column in columns))
+        return columns
+    return [int.from_bytes(value[start:start + size], 'little')
+            for start in range(0, len(value), size)]
+
+
+@profiler.timed('evaluate')
+def fingerprints(variables: List[str], tokens: List[Token],
+                 rows: int = FINGERPRINT_ROWS) -> List[int]:
+    # values on the same random assignments, packed into integer columns:
+    # equivalent tokens always agree, inequivalent ones very likely don't
+    from random import getrandbits
+    mask = (1 << rows) - 1
+    columns = [getrandbits(rows) for _ in variables]
+    return [token.evaluator(variables, bitwise=True)(mask, *columns)
+            for token in tokens]
+
+
+def solver_equivalent(tokens: List[Token]) -> bool:
+    # equivalent iff no assignment makes any token differ from the first
+    from sat import CNF, satisfy
+    cnf = CNF()
+    first = cnf.encode(tokens[0])
+    cnf.add(*[cnf.xor([first, cnf.encode(token)]) for token in tokens[1:]])
+    return satisfy(cnf) is None
+
+
+def paired_test(test: Tuple[Token, Token],
+                config: Config) -> Tuple[Optional[List[List[str | int]]], bool]:
+    # annotated truth table (None past the SAT threshold) and the verdict of a pair
+    argument = Argument([Proposition(token, config) for token in test], config=config)
+    table = None if argument.use_solver else argument.truth_table(annotate='equivalence')
+    return table, argument.test_equivalence()
+
+
+def paired_tests(tests: List[Tuple[Token, Token]], config: Config) -> List['Future']:
+    from concurrent.futures import ThreadPoolExecutor
+    # pairs are spread over processes rather than sharded individually
+    workers = min(config.workers, len(tests))
+    if workers > 1 and fork_context() is not None:
+        executor = process_pool(workers)
+        from copy import copy
+        config = copy(config)
+        config.workers = 1
+    else:
+        # a single thread still computes ahead of the printing
+        executor = ThreadPoolExecutor(1)
+    futures = [executor.submit(paired_test, test, config) for test in tests]
+    executor.shutdown(wait=False)
+    return futures
+
+
 class Proposition:
     def __init__(self, sentence: str | Token,
                  config: Config = Config()):
@@ -33,12 +463,7 @@ class Proposition:
             self.token = sentence
         else:
             assert isinstance(sentence, str) and sentence != '', NULL_SENTENCE
-            sentence = standardize_notations(sentence.strip())
-            try:
-                self.parsed = parse(sentence)
-            except SyntaxError:
-                print(UNMATCHED_PARENTHESES)
-                exit()
+            self.sentence = sentence.strip()
             self.compile()
 
     def __repr__(self) -> str:
@@ -52,6 +477,7 @@ class Proposition:
         return False
 
     @cached_property
+    @profiler.timed('variables')
     def variables(self) -> List[str]:
         return self.token.variables
 
@@ -60,119 +486,84 @@ class Proposition:
         return self.token.sentences
 
     def compile(self):
-        def _compile(s: List) -> Token:
-            # variables
-            if isinstance(s, str):
-                assert good_name(s), f"Bad name: '{s}'\n{NAME_HELP}"
-                return Variable(s)
-
-            # expressions
-            assert isinstance(s, list) and len(s) > 0, NULL_SENTENCE
-            # for error
-
-            def expr(s: List) -> str:
-                s = [expr(i) if isinstance(i, list) else i for i in s]
-                return f"'{' '.join(s)}'"
-
-            if len(s) == 1:
-                # ((...)) OR ({variable})
-                # get rid of encapsulating parentheses
-                arg: str | List = s[0]
-                return _compile(arg)
-            elif len(s) == 2:
-                # (not (...))
-                assert s[0] == 'not', MISSING_COMPONENTS + f"{expr(s)}."
-                arg: str | List = s[1]
-                token: Token = _compile(arg)
-                if type(token) is Negation:
-                    # apply double negation equivalence rule
-                    return token.negated
-                return Negation(token)
-            elif len(s) > 2:
-                # any other forms
-                initializers = {'and': Conjunction,
-                                'or': Disjunction,
-                                'xor': XDisjunction,
-                                '->': Implication,
-                                'iff': Biconditional}
-                for operator in OPS_BY_PRECEDENCE:
-                    try:
-                        index = s.index(operator)
-                        assert index > 0, MISSING_COMPONENTS + f"{expr(s)}."
-                    except ValueError:
-                        continue
-
-                    lhs: Token = _compile(s[:index])
-                    rhs: Token = _compile(s[index + 1:])
-
-                    token: Token = initializers[operator](lhs, rhs)
-
-                    # get rid of unnecessary parentheses
-                    if operator in ASSOCIATIVE_OPERATORS:
-                        # and, or, xor, iff
-                        assert isinstance(token, NaryExpression)
-                        if type(lhs) is type(token):
-                            token.operands = lhs.operands + token.operands[1:]
-                        if type(rhs) is type(token):
-                            token.operands = token.operands[:-1] + rhs.operands
-                    return token
-
-                # no N-ary operators, then it must be multiple negations
-                assert s[0] == 'not', \
-                    f"Expected a NOT operator but found non-operator token '{s[0]}'."
-                return _compile(['not', s[1:]])
-            else:
-                # unless in the event of a single-event upset (SEU), it should NEVER get here
-                raise Exception(UNEXPECTED_ERROR)
-        self.token = _compile(self.parsed)
+        self.token = parse(self.sentence)
 
     @cached_property
-    def truth_table(self) -> List[List[str | int]]:
+    def truth_table(self) -> 'TruthTable':
+        from table import TruthTable
         variables = self.variables
-        cases = list(product([0, 1], repeat=len(variables)))
-        if self.config.reverse:
-            cases = cases[::-1]
         # sentences of interest
         if self.config.atoms:
             # get unique constituent sentences
-            sentences = self.sentences
-            # o o o o ... o o x
-            for i in range(len(sentences) - 1):
-                # o [o] o o ... o o o
-                # x  x  o o ... o o o
-                for j in range(i + 1, len(sentences)):
-                    if sentences[i] == sentences[j]:
-                        # mark the later for removal
-                        sentences[j] = None
-            sentences = [s for s in sentences if s is not None]
+            # keeping the first of the commutative/associative-equivalent ones
+            sentences = unique(self.sentences)
         else:
             sentences = [self.token]
-        # truth table
-        table: List[List[str | int]] = [variables + [display(s) for s in sentences]]
-        for case in cases:
-            # variable columns
-            row = list(case)
-            # make key-value variable assignments
-            assignments = dict(zip(variables, case))
-            # evalute for each sentence and at to row correspondingly
-            for sentence in sentences:
-                truth_value = sentence.evaluate(**assignments)
-                row.append(truth_value)
-            # add row to table
-            table.append(row)
-        return table
+        if self.config.spill:
+            # evaluated into a mapped file rather than memory
+            filepath = preprocess_filename(self.config.spill, '.ltt')
+            return spill_table(filepath, variables, sentences, self.config)
+        return TruthTable(variables, [display(s) for s in sentences],
+                          cached_columns(variables, sentences, self.config))
 
     def output_truth_table(self, filepath: Optional[str] = None):
         table = self.truth_table
         output_table(table, labels=self.config.labels, filepath=filepath)
     
-    def is_tautology(self) -> bool:
-        table = self.truth_table
-        return all(row[-1] for row in table[1:])
+    @cached_property
+    def diagram(self) -> Tuple['BDD', int]:
+        from bdd import BDD
+        bdd = BDD(self.variables)
+        return bdd, bdd.build(self.token)
     
-    def is_contradiction(self) -> bool:
-        table = self.truth_table
-        return not any(row[-1] for row in table[1:])
+    @remembered(lambda self, *_, **__: ['tautology', self.token.canonical_key])
+    def is_tautology(self, workers: Optional[int] = None) -> bool:
+        if self.config.engine == 'bdd':
+            from bdd import TRUE
+            return self.diagram[1] == TRUE
+        if 'truth_table' in self.__dict__:
+            # already evaluated
+            return self.truth_table.all_true(self.token)
+        # stop at the first row that is false
+        return search_countermodel(self.variables, [], self.token,
+                                   self.config, workers) is None
+    
+    @remembered(lambda self, *_, **__: ['contradiction', self.token.canonical_key])
+    def is_contradiction(self, workers: Optional[int] = None) -> bool:
+        if self.config.engine == 'bdd':
+            from bdd import FALSE
+            return self.diagram[1] == FALSE
+        if 'truth_table' in self.__dict__:
+            return self.truth_table.find(self.token) is None
+        # stop at the first row that is true
+        return search_countermodel(self.variables, [], Negation(self.token),
+                                   self.config, workers) is None
+
+    @remembered(lambda self: ['count', self.token.canonical_key])
+    def count_models(self) -> int:
+        # number of rows that are true
+        if self.config.engine == 'bdd':
+            bdd, node = self.diagram
+            return bdd.count(node)
+        return sum(count_set(column) for _, _, (column,)
+                   in truth_chunks(self.variables, [self.token], self.config))
+
+    # the first model depends on the variable order
+    @remembered(lambda self, *_, **__: ['model', ' '.join(self.variables),
+                                  str(int(self.config.reverse)), self.token.canonical_key])
+    def find_model(self, workers: Optional[int] = None) -> Optional[Dict[str, int]]:
+        # first row that is true, if any
+        if self.config.engine == 'bdd':
+            bdd, node = self.diagram
+            return bdd.model(node, int(self.config.reverse))
+        if 'truth_table' in self.__dict__:
+            row = self.truth_table.find(self.token)
+            return None if row is None else self.truth_table.assignment(row)
+        model = search_countermodel(self.variables, [], Negation(self.token),
+                                    self.config, workers)
+        if model is None:
+            return None
+        return dict(zip(self.variables, model))
 
 
 class Argument:
@@ -202,6 +593,7 @@ class Argument:
         self.config = config
     
     @cached_property
+    @profiler.timed('variables')
     def variables(self) -> List[str]:
         variables: List[str] = []
         sentences = self.sentences
@@ -213,116 +605,200 @@ class Argument:
     def sentences(self) -> List[Proposition]:
         return self.premises + ([self.conclusion] if self.conclusion else [])
 
-    def truth_table(self, annotate: Optional[Literal['validity', 'equivalence']] = None) -> List[List[str | int]]:
+    @cached_property
+    def diagram(self) -> 'BDD':
+        # shared by all sentences so that equivalent ones share a node
+        from bdd import BDD
+        return BDD(self.variables)
+
+    @property
+    def use_solver(self) -> bool:
+        # truth tables are out of reach for this many variables
+        return len(self.variables) > self.config.sat_threshold
+
+    # evaluation and variable collection are phases of their own
+    @profiler.timed('annotate')
+    def truth_table(self, annotate: Optional[Literal['validity', 'equivalence']] = None) -> 'TruthTable':
+        from table import TruthTable
         variables = self.variables
-        cases = list(product([0, 1], repeat=len(variables)))
-        if self.config.reverse:
-            cases = cases[::-1]
         # sentences of interest
         sentences = self.sentences
         # remove sentences that are variables to account for the case
         # in which the conclusion of an argument is a single variable
         sentences = [s for s in sentences if all(s != var for var in variables)]
 
-        # truth table
-        table: List[List[str | int]] = [variables + [display(s) for s in sentences]]
+        header: List[str] = variables + [display(s) for s in sentences]
+        columns = cached_columns(variables, [sentence.token for sentence in sentences], self.config)
+        rows = 1 << len(variables)
         # get premises and conclusion columns
-        header: List[str] = table[0]
-        prem_col_indices: List[int] = [header.index(display(s)) for s in self.premises]
-        if self.conclusion:
-            concl_col_index: int = header.index(display(self.conclusion))
-
-        if annotate and MARK_COLUMN not in table[0]:
-            table[0].append(MARK_COLUMN)
-        
-        for case in cases:
-            # variable columns
-            row = list(case)
-            # make key-value variable assignments
-            assignments = dict(zip(variables, case))
-            # evalute for each sentence and at to row correspondingly
-            for sentence in sentences:
-                truth_value = sentence.token.evaluate(**assignments)
-                row.append(truth_value)
-            
-            # get premises and conclusion values
-            premises = [row[i] for i in prem_col_indices]
-
-            # add annotation marks
-            if annotate == 'validity':
-                conclusion = row[concl_col_index]
-                mark = green(CHECK_MARK)
-                # mark cross for countermodels
-                if all(premises) and not conclusion:
-                    mark = red(CROSS_MARK)
-                mark = f" {bold(mark)} "
-                row.append(mark)
-            elif annotate == 'equivalence':
-                mark = red(CROSS_MARK)
-                # mark check for all equivalent rows (all 1/0s)
-                if all(premises) or not any(premises):
-                    mark = green(CHECK_MARK)
-                mark = f" {bold(mark)} "
-                row.append(mark)
-            # add row to table
-            table.append(row)
-        return table
+        premises = [columns[header.index(display(s))] for s in self.premises]
+
+        # annotation marks: rows marked with a check
+        marks = None
+        mask = (1 << rows) - 1
+        if annotate == 'validity':
+            conclusion = columns[header.index(display(self.conclusion))]
+            # mark cross for countermodels
+            countermodels = conclusion ^ mask
+            for premise in premises:
+                countermodels &= premise
+            marks = countermodels ^ mask
+        elif annotate == 'equivalence':
+            # mark check for all equivalent rows (all 1/0s)
+            true, false = mask, mask
+            for premise in premises:
+                true &= premise
+                false &= premise ^ mask
+            marks = true | false
+        return TruthTable(variables, header[len(variables):], columns, marks)
     
     def output_truth_table(self, annotate: Optional[Literal['validity', 'equivalence']] = None,
                            filepath: Optional[str] = None):
         table = self.truth_table(annotate=annotate)
         output_table(table, labels=self.config.labels, filepath=filepath)
 
-    def is_valid(self) -> bool:
-        table = self.truth_table(annotate='validity')
-        # for each row, excluding the header
-        for row in table[1:]:
-            if CROSS_MARK in row[-1]:
-                # countermodel marked
-                if self.config.log_countermodel:
-                    # get first N columns as variables
-                    var_cols = row[:len(self.variables)]
-                    # build countermodel
-                    countermodel = [f"{var} = {val}"
-                                    for var, val in zip(self.variables, var_cols)]
-                    countermodel = ', '.join(countermodel)
-                    print(bold(yellow("Countermodel:", countermodel)))
-                return False
-        # premises -> conclusion is tautology
-        return True
+    @remembered(lambda self, *_, **__: ['countermodel', *self.countermodel_context,
+                                  self.conclusion.token.canonical_key,
+                                  *sorted(premise.token.canonical_key for premise in self.premises)])
+    def find_countermodel(self, workers: Optional[int] = None) -> Optional[Dict[str, int]]:
+        # variable -> value, ordered as self.variables
+        if self.config.engine == 'bdd':
+            # first countermodel in table order
+            bdd = self.diagram
+            premises = [bdd.build(premise.token) for premise in self.premises]
+            conclusion = bdd.negate(bdd.build(self.conclusion.token))
+            return bdd.model(bdd.conjunction(premises + [conclusion]), int(self.config.reverse))
+        if self.use_solver:
+            # satisfying assignment of premises AND NOT conclusion, if any
+            from sat import CNF, satisfy
+            cnf = CNF()
+            for premise in self.premises:
+                cnf.add(cnf.encode(premise.token))
+            cnf.add(-cnf.encode(self.conclusion.token))
+            countermodel = satisfy(cnf)
+            if countermodel is None:
+                return None
+            return {var: countermodel[var] for var in self.variables}
+        if memoizable(self.variables, self.config):
+            # columns are likely evaluated for the table already
+            tokens = [premise.token for premise in self.premises] + [self.conclusion.token]
+            *premises, conclusion = memo_columns(self.variables, tokens, self.config)
+            countermodels = conclusion ^ ((1 << (1 << len(self.variables))) - 1)
+            for premise in premises:
+                countermodels &= premise
+            index = first_set(countermodels)
+            if index is None:
+                return None
+            return row_model(self.variables, index, self.config)
+        # stop at the first countermodel
+        countermodel = search_countermodel(self.variables,
+                                           [premise.token for premise in self.premises],
+                                           self.conclusion.token, self.config, workers)
+        if countermodel is None:
+            return None
+        return dict(zip(self.variables, countermodel))
+
+    @property
+    def countermodel_context(self) -> List[str]:
+        # countermodels are the first in table order, except for the SAT solver's
+        method = 'solver' if self.use_solver and self.config.engine != 'bdd' else 'table'
+        return [' '.join(self.variables), str(int(self.config.reverse)), method]
+
+    def print_countermodel(self, values: List[int]):
+        countermodel = [f"{var} = {val}"
+                        for var, val in zip(self.variables, values)]
+        countermodel = ', '.join(countermodel)
+        print(bold(yellow("Countermodel:", countermodel)))
+
+    def is_valid(self, workers: Optional[int] = None) -> bool:
+        countermodel = self.find_countermodel(workers)
+        if countermodel is None:
+            # premises -> conclusion is tautology
+            return True
+        if self.config.log_countermodel:
+            self.print_countermodel(list(countermodel.values()))
+        return False
     
-    def test_equivalence(self, mode: Literal['default', 'paired'] = 'default') -> bool:
+    def equivalence_classes(self) -> List[List[Proposition]]:
+        # sentences bucketed by truth vector over all variables,
+        # one evaluation per sentence instead of one table per pair
+        sentences: List[Proposition] = self.premises
+        tokens = [sentence.token for sentence in sentences]
+        # whether bucket members may differ
+        confirm = False
+        if self.config.engine == 'bdd':
+            # canonical: equivalent sentences share a node
+            vectors = [self.diagram.build(token) for token in tokens]
+        elif self.use_solver:
+            # truth vectors are out of reach, bucket by fingerprint instead
+            vectors = fingerprints(self.variables, tokens)
+            confirm = True
+        else:
+            _, columns = truth_columns(self.variables, tokens, self.config)
+            vectors = [column_key(column) for column in columns[len(self.variables):]]
+        # truth vector -> classes
+        buckets: Dict[int | bytes, List[List[Proposition]]] = {}
+        classes: List[List[Proposition]] = []
+        for sentence, vector in zip(sentences, vectors):
+            bucket = buckets.setdefault(vector, [])
+            for group in bucket:
+                # fingerprints may collide, confirm with the SAT solver
+                if not confirm or solver_equivalent([group[0].token, sentence.token]):
+                    group.append(sentence)
+                    break
+            else:
+                bucket.append([sentence])
+                classes.append(bucket[-1])
+        return classes
+
+    # the other modes print their tests
+    @remembered(lambda self, mode='default': None if mode != 'default' else
+                ['equivalence', *sorted(sentence.token.canonical_key for sentence in self.premises)])
+    def test_equivalence(self, mode: Literal['default', 'paired', 'tree'] = 'default') -> bool:
         sentences: List[Proposition] = self.premises
 
         if mode == 'default':
-            # direct test: if all sentences are equivalent
-            tests: List[Biconditional] = []
-            for sentence in sentences[1:]:
-                biconditional = Biconditional(sentences[0].token, sentence.token)
-                tests.append(Proposition(biconditional))
-            # test if all test cases are tautologies
-            return all(test.is_tautology() for test in tests)
+            if self.config.engine == 'bdd':
+                # pointer equality
+                return len({self.diagram.build(sentence.token) for sentence in sentences}) == 1
+            if self.use_solver:
+                return solver_equivalent([sentence.token for sentence in sentences])
+            # direct test: compare every sentence against the first one
+            tokens = [sentence.token for sentence in sentences]
+            if memoizable(self.variables, self.config):
+                # columns are likely evaluated for the table already
+                first, *others = memo_columns(self.variables, tokens, self.config)
+                return all(other == first for other in others)
+            # stop at the first row where they differ
+            for _, mask, (first, *others) in truth_chunks(self.variables, tokens, self.config):
+                # (first iff other) is all ones
+                if not all(all_set(first ^ mask ^ other, mask) for other in others):
+                    return False
+            return True
         elif mode == 'paired':
             # paired (combinations) test
             tests = list(combinations(sentences, 2))
             all_equivalent = True
             summary_table: List[List[str]] = [['Tests', MARK_COLUMN]]
             pass_count = 0
-            for index, test in enumerate(tests):
-                # test if the two sentences are equivalent using biconditional
+            # pairs are tested in a pool, but printed in test order
+            futures = paired_tests([(p1.token, p2.token) for p1, p2 in tests], self.config)
+            for index, (test, future) in enumerate(zip(tests, futures)):
+                # test if the two sentences are equivalent
                 p1, p2 = test
                 display_expr = EQUIV_SYMBOL.join([display(p1), display(p2)])
                 # log test case
                 print(
                     bold(yellow(f"Test {index + 1}:")), display_expr
                 )
-                # print truth table with markings
-                # the truth table will inherit configs from current object
-                Argument(test, config=self.config).output_truth_table(annotate='equivalence')
+                table, is_equivalent = future.result()
+                if table is None:
+                    print(SAT_NOTE.format(len(unique(p1.variables + p2.variables))))
+                else:
+                    # print truth table with markings
+                    output_table(table, labels=self.config.labels)
                 print()
 
-                biconditional = Proposition(Biconditional(p1.token, p2.token))
-                is_equivalent = biconditional.is_tautology()
                 if is_equivalent:
                     summary_table.append(
                         [display_expr, f" {bold(green(CHECK_MARK))} "]
@@ -340,7 +816,75 @@ class Argument:
             output_table(summary_table)
 
             return all_equivalent
+        elif mode == 'tree':
+            # partition into equivalence classes
+            classes = self.equivalence_classes()
+            summary_table: List[List[str]] = [['Classes', 'Statements']]
+            for index, group in enumerate(classes):
+                summary_table.append([index + 1, EQUIV_SYMBOL.join([display(s) for s in group])])
+            print(bold(yellow('Summary:')),
+                  f"{len(classes)} equivalence class{'es' if len(classes) > 1 else ''}.")
+            output_table(summary_table)
+
+            return len(classes) == 1
         else:
             # unknown mode: should NEVER get here
             raise Exception(UNEXPECTED_ERROR)
 
+
+class Session:
+    # sentences entered one at a time (interactively), with their columns kept
+    # over the variables so far: variables are ordered by appearance as in Argument,
+    # so the variables a sentence introduces come last, and the columns of the
+    # sentences before it are extended by repeating their rows, not evaluated again
+    def __init__(self, config: Config = Config()):
+        self.config = config
+        self.sentences: List[Proposition] = []
+        self.variables: List[str] = []
+        # one per sentence, empty past the SAT threshold
+        self.columns: List[int] = []
+
+    @property
+    def use_solver(self) -> bool:
+        return len(self.variables) > self.config.sat_threshold
+
+    def add(self, sentence: Proposition):
+        self.sentences.append(sentence)
+        for variable in sentence.variables:
+            if variable in self.variables:
+                continue
+            self.columns = [spread_column(column, len(self.variables))
+                            for column in self.columns]
+            self.variables.append(variable)
+        if self.use_solver:
+            # too many rows to keep, verdicts are left to the SAT solver
+            self.columns = []
+            return
+        self.columns.append(table_columns(self.variables, [sentence.token], self.config)[-1])
+        if memoizable(self.variables, self.config):
+            # so that the table and verdict of the final argument reuse them
+            context = (tuple(self.variables), self.config.reverse)
+            size = ((1 << len(self.variables)) + 7) // 8
+            for sentence, column in zip(self.sentences, self.columns):
+                column_memo.put((sentence.token, context), column, size)
+
+    def is_equivalent(self) -> bool:
+        # whether all sentences so far are equivalent
+        if self.use_solver:
+            return solver_equivalent([sentence.token for sentence in self.sentences])
+        first, *others = self.columns
+        return all(other == first for other in others)
+
+    def find_countermodel(self) -> Optional[Dict[str, int]]:
+        # of the last sentence following from the ones before it
+        if self.use_solver:
+            *premises, conclusion = self.sentences
+            return Argument(premises, conclusion, self.config).find_countermodel()
+        *premises, conclusion = self.columns
+        countermodels = conclusion ^ ((1 << (1 << len(self.variables))) - 1)
+        for premise in premises:
+            countermodels &= premise
+        index = first_set(countermodels)
+        if index is None:
+            return None
+        return row_model(self.variables, index, self.config)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Tuple, Type, Union
+
+from constants import *
+from helpers import good_name, lex
+from fol import (Biconditional, Conjunction, Disjunction, Implication, NaryExpression,
+                 Negation, Token, Variable, XDisjunction)
+from profiling import profiler
+
+# operator -> (precedence, initializer), from low to high
+INITIALIZERS = {'iff': Biconditional, '->': Implication, 'xor': XDisjunction,
+                'or': Disjunction, 'and': Conjunction}
+BINARY_OPERATORS = {operator: (precedence, INITIALIZERS[operator])
+                    for precedence, operator in enumerate(OPS_BY_PRECEDENCE)}
+
+
+def syntax_error(message: str, s: str, position: int) -> str:
+    # point at the offending position
+    return f"{message.format(position)}\n{s}\n{' ' * position}^"
+
+
+if TYPE_CHECKING:
+    # operands of a chain of and/or/xor still being parsed, see parse
+    Chain = Tuple[Type[NaryExpression], List[Token]]
+
+
+def build(operand: Union[Token, Chain]) -> Token:
+    if isinstance(operand, tuple):
+        initializer, arguments = operand
+        return initializer(*arguments)
+    return operand
+
+
+def negate(token: Token) -> Token:
+    if type(token) is Negation:
+        # apply double negation equivalence rule
+        return token.negated
+    return Negation(token)
+
+
+@profiler.timed('parse')
+def parse(s: str) -> Token:
+    # operator-precedence parsing with explicit stacks (no recursion),
+    # all binary operators associate to the right, e.g. a -> b -> c is a -> (b -> c),
+    # and chains of and/or/xor are flattened into a single n-ary expression
+    # chains are kept as operand lists until they are an operand of something else
+    # (or the result), so that parenthesized chains are merged without building
+    # a token per pair of parentheses, i.e. in linear time
+    operands: List[Union[Token, Chain]] = []
+    # (operator, position), including 'not' and '('
+    operators: List[Tuple[str, int]] = []
+
+    def reduce():
+        # pop the topmost operator along with every directly chained one
+        operator, _ = operators.pop()
+        count = 1
+        while operators and operators[-1][0] == operator:
+            operators.pop()
+            count += 1
+        initializer = BINARY_OPERATORS[operator][1]
+        arguments = operands[-count - 1:]
+        del operands[-count - 1:]
+        if operator in ASSOCIATIVE_OPERATORS:
+            # get rid of unnecessary parentheses
+            flattened: List[Token] = []
+            for index, argument in enumerate(arguments):
+                if isinstance(argument, tuple) and argument[0] is initializer:
+                    if index == 0:
+                        # e.g. ((a and b) and c): extended in place
+                        flattened = argument[1]
+                    else:
+                        flattened += argument[1]
+                elif type(argument) is initializer:
+                    flattened += argument.operands
+                else:
+                    flattened.append(build(argument))
+            operands.append((initializer, flattened))
+            return
+        # right associative
+        token = build(arguments.pop())
+        while arguments:
+            token = initializer(build(arguments.pop()), token)
+        operands.append(token)
+
+    def complete():
+        # apply pending negations to the operand just completed
+        while operators and operators[-1][0] == 'not':
+            operators.pop()
+            operands.append(negate(build(operands.pop())))
+
+    expect_operand = True
+    for lexeme, position in lex(s):
+        if expect_operand:
+            if lexeme in ['not', '(']:
+                operators.append((lexeme, position))
+                continue
+            assert lexeme not in BINARY_OPERATORS and lexeme != ')', \
+                syntax_error(MISSING_OPERAND, s, position)
+            assert good_name(lexeme), f"Bad name: '{lexeme}'\n{NAME_HELP}"
+            operands.append(Variable(lexeme))
+            complete()
+            expect_operand = False
+        elif lexeme in BINARY_OPERATORS:
+            precedence = BINARY_OPERATORS[lexeme][0]
+            # reduce operators of higher precedence first
+            while operators and operators[-1][0] in BINARY_OPERATORS and \
+                    BINARY_OPERATORS[operators[-1][0]][0] > precedence:
+                reduce()
+            operators.append((lexeme, position))
+            expect_operand = True
+        elif lexeme == ')':
+            while operators and operators[-1][0] != '(':
+                reduce()
+            assert operators, syntax_error(UNMATCHED_PARENTHESES, s, position)
+            operators.pop()
+            complete()
+        else:
+            # a name, 'not' or '(' following an operand
+            assert False, syntax_error(MISSING_OPERATOR, s, position)
+
+    assert operands or operators, NULL_SENTENCE
+    assert not expect_operand, syntax_error(MISSING_OPERAND, s, len(s))
+    while operators:
+        assert operators[-1][0] != '(', \
+            syntax_error(UNMATCHED_PARENTHESES, s, operators[-1][1])
+        reduce()
+    token = build(operands[0])
+    if profiler.enabled:
+        profiler.count('nodes', len(token.postorder()))
+    return token
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterator, List
+
+
+class Profiler:
+    # opt-in wall time and call counts per phase, plus event counters,
+    # of the current process (work done in worker processes isn't recorded)
+    # time is exclusive: a phase entered within another pauses the outer one
+    # of the same thread, phases of other threads (e.g. a paired test computed
+    # ahead of the printing) are timed on their own
+    def __init__(self):
+        self.enabled = False
+        # phase -> seconds/calls
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        # counter -> count
+        self.counters: Dict[str, int] = {}
+        # (phase, start) of the phases entered, per thread
+        self.threads: Any = None
+        self.lock: Any = None
+
+    def enable(self):
+        # only profiled runs pay for importing threading
+        from threading import Lock, local
+        self.threads = local()
+        self.lock = Lock()
+        self.enabled = True
+
+    def reset(self):
+        self.seconds.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    @property
+    def stack(self) -> List[List[Any]]:
+        if not hasattr(self.threads, 'stack'):
+            self.threads.stack = []
+        return self.threads.stack
+
+    def add(self, name: str, seconds: float, calls: int = 0):
+        with self.lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + calls
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        stack = self.stack
+        now = perf_counter()
+        if stack:
+            outer, start = stack[-1]
+            self.add(outer, now - start)
+        stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = perf_counter()
+            _, start = stack.pop()
+            self.add(name, now - start, 1)
+            if stack:
+                # resume the outer phase
+                stack[-1][1] = now
+
+    def timed(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        # decorator recording every call of a function as the given phase
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            @wraps(function)
+            def wrapper(*args, **kwargs) -> Any:
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self.phase(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self) -> List[List[List[Any]]]:
+        # tables of phases and counters, see helpers.output_table
+        total = sum(self.seconds.values()) or 1.0
+        phases = [['Phase', 'Calls', 'Seconds', '%']]
+        for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            phases.append([name, self.calls[name], f"{seconds:.6f}", f"{100 * seconds / total:.1f}"])
+        counters = [['Counter', 'Count']] + [[name, count] for name, count in self.counters.items()]
+        return [phases, counters]
+
+    def to_json(self) -> str:
+        import json
+        return json.dumps({'phases': {name: {'calls': self.calls[name], 'seconds': seconds}
+                                      for name, seconds in self.seconds.items()},
+                           'counters': self.counters})
+
+
+profiler = Profiler()
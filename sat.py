@@ -0,0 +1,268 @@
+from typing import Dict, List, Optional
+
+
+class CNF:
+    # clauses over integer literals (DIMACS style): v is true, -v is false
+    def __init__(self):
+        self.count = 0
+        self.clauses: List[List[int]] = []
+        # variable name -> variable
+        self.names: Dict[str, int] = {}
+        # id(token) -> literal
+        self.gates: Dict[int, int] = {}
+
+    def new(self) -> int:
+        self.count += 1
+        return self.count
+
+    def variable(self, name: str) -> int:
+        if name not in self.names:
+            self.names[name] = self.new()
+        return self.names[name]
+
+    def add(self, *literals: int):
+        clause = list(dict.fromkeys(literals))
+        if any(-literal in clause for literal in clause):
+            # tautological clause, always satisfied
+            return
+        self.clauses.append(clause)
+
+    def encode(self, token) -> int:
+        # Tseitin encoding: literal equisatisfiable with the token
+        # shared subformulas are encoded once
+        for node in token.postorder():
+            if id(node) not in self.gates:
+                operands = [self.gates[id(child)] for child in node.children]
+                self.gates[id(node)] = node.encode(self, operands)
+        return self.gates[id(token)]
+
+    # gates: each returns a fresh literal g constrained to equal the gate output
+
+    def conjunction(self, literals: List[int]) -> int:
+        g = self.new()
+        for literal in literals:
+            self.add(-g, literal)
+        self.add(g, *[-literal for literal in literals])
+        return g
+
+    def disjunction(self, literals: List[int]) -> int:
+        g = self.new()
+        for literal in literals:
+            self.add(g, -literal)
+        self.add(-g, *literals)
+        return g
+
+    def xor(self, literals: List[int]) -> int:
+        g = literals[0]
+        for literal in literals[1:]:
+            x, g = g, self.new()
+            self.add(-g, x, literal)
+            self.add(-g, -x, -literal)
+            self.add(g, -x, literal)
+            self.add(g, x, -literal)
+        return g
+
+    def model(self, assignment: Dict[int, bool]) -> Dict[str, int]:
+        return {name: int(assignment[variable])
+                for name, variable in self.names.items()}
+
+
+class Solver:
+    # conflict-driven clause learning with two watched literals,
+    # first-UIP learning, activity-based decisions, phase saving and restarts
+    def __init__(self, cnf: CNF):
+        count = cnf.count
+        self.count = count
+        # 0: unassigned, 1: true, -1: false
+        self.values: List[int] = [0] * (count + 1)
+        self.levels: List[int] = [0] * (count + 1)
+        self.reasons: List[Optional[int]] = [None] * (count + 1)
+        self.phases: List[int] = [-1] * (count + 1)
+        self.activity: List[float] = [0.0] * (count + 1)
+        self.increment = 1.0
+        self.trail: List[int] = []
+        self.trail_limits: List[int] = []
+        self.head = 0
+        self.clauses: List[List[int]] = []
+        self.watches: Dict[int, List[int]] = {}
+        for variable in range(1, count + 1):
+            self.watches[variable] = []
+            self.watches[-variable] = []
+        # trivially unsatisfiable, e.g. empty or conflicting unit clauses
+        self.conflicting = False
+        for clause in cnf.clauses:
+            if not self.add(list(clause)):
+                self.conflicting = True
+                break
+
+    def value(self, literal: int) -> int:
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def level(self) -> int:
+        return len(self.trail_limits)
+
+    def assign(self, literal: int, reason: Optional[int]):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = self.level()
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def add(self, clause: List[int]) -> bool:
+        # called at decision level 0 only
+        if len(clause) == 0:
+            return False
+        if len(clause) == 1:
+            value = self.value(clause[0])
+            if value == 0:
+                self.assign(clause[0], None)
+            return value != -1
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return True
+
+    def propagate(self) -> Optional[int]:
+        # returns the index of a conflicting clause, if any
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches[false_literal]
+            self.watches[false_literal] = kept = []
+            for position, index in enumerate(watchers):
+                clause = self.clauses[index]
+                # keep the false literal at position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) == 1:
+                    kept.append(index)
+                    continue
+                # look for a new literal to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) == -1:
+                        kept.extend(watchers[position + 1:])
+                        return index
+                    # unit: the first literal is implied
+                    self.assign(clause[0], index)
+        return None
+
+    def bump(self, variable: int):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            # rescale to avoid overflow
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def analyze(self, conflict: int) -> List[int]:
+        # first unique implication point
+        learnt: List[int] = [0]
+        seen = set()
+        counter = 0
+        literal = 0
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        start = 0
+        while True:
+            for q in clause[start:]:
+                variable = abs(q)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == self.level():
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            # next literal of the current level on the trail
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            seen.discard(abs(literal))
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+            # skip the implied literal itself
+            start = 1
+        learnt[0] = -literal
+        self.increment /= 0.95
+        return learnt
+
+    def backtrack(self, level: int):
+        if self.level() <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = 0
+            self.reasons[variable] = None
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.head = limit
+
+    def decide(self) -> Optional[int]:
+        best, best_activity = 0, -1.0
+        for variable in range(1, self.count + 1):
+            if self.values[variable] == 0 and self.activity[variable] > best_activity:
+                best, best_activity = variable, self.activity[variable]
+        if best == 0:
+            return None
+        return best * self.phases[best]
+
+    def solve(self) -> Optional[Dict[int, bool]]:
+        # a satisfying assignment, or None if unsatisfiable
+        if self.conflicting or self.propagate() is not None:
+            return None
+        conflicts, restart_limit = 0, 100
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if self.level() == 0:
+                    return None
+                conflicts += 1
+                learnt = self.analyze(conflict)
+                # backjump to the second highest level in the learnt clause
+                level = 0
+                if len(learnt) > 1:
+                    k = max(range(1, len(learnt)),
+                            key=lambda i: self.levels[abs(learnt[i])])
+                    learnt[1], learnt[k] = learnt[k], learnt[1]
+                    level = self.levels[abs(learnt[1])]
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    index = len(self.clauses)
+                    self.clauses.append(learnt)
+                    self.watches[learnt[0]].append(index)
+                    self.watches[learnt[1]].append(index)
+                    self.assign(learnt[0], index)
+            else:
+                if conflicts >= restart_limit:
+                    # geometric restarts, learnt clauses are kept
+                    conflicts, restart_limit = 0, int(restart_limit * 1.5)
+                    self.backtrack(0)
+                    continue
+                literal = self.decide()
+                if literal is None:
+                    return {variable: self.values[variable] == 1
+                            for variable in range(1, self.count + 1)}
+                self.trail_limits.append(len(self.trail))
+                self.assign(literal, None)
+
+
+def satisfy(cnf: CNF) -> Optional[Dict[str, int]]:
+    # named model of the cnf, or None if unsatisfiable
+    assignment = Solver(cnf).solve()
+    if assignment is None:
+        return None
+    return cnf.model(assignment)
@@ -0,0 +1,178 @@
+import asyncio
+import json
+from concurrent.futures import Executor, ThreadPoolExecutor
+from copy import copy
+from os import path, remove
+from signal import SIGTERM
+from sys import stderr
+from time import perf_counter
+
+from typing import Any, Dict, Optional, Tuple
+
+from constants import *
+from cache import LRUCache
+from jobs import answer_job, make_job
+from objects import Config, fork_context, process_pool
+
+# HTTP status -> reason
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found'}
+
+
+class Server:
+    # a warm process answering jobs (see jobs.py) as JSON requests, concurrently:
+    # the event loop reads requests while a pool of workers runs the jobs,
+    # each worker keeping its interned tokens, compiled evaluators and memoized
+    # columns across requests, and identical jobs are answered from memory
+    def __init__(self, config: Config, workers: int = 1, command: str = JOB_COMMANDS[0]):
+        self.config = config
+        self.command = command
+        self.executor: Executor
+        if workers > 1 and fork_context() is not None:
+            self.executor = process_pool(workers)
+            # jobs are spread over processes rather than sharded individually
+            self.config = copy(config)
+            self.config.workers = 1
+        else:
+            # keeps the event loop responsive
+            self.executor = ThreadPoolExecutor(1)
+        # job -> result, the least recently used ones are dropped
+        self.results = LRUCache(SERVER_CACHE_SIZE)
+        # counters, see stats
+        self.started = perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.hits = 0
+        self.active = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = perf_counter() - self.started
+        return {'uptime': uptime,
+                'requests': self.requests,
+                'errors': self.errors,
+                'cached': self.hits,
+                'active': self.active,
+                'throughput': self.requests / uptime,
+                'latency': {'mean': self.latency / self.requests if self.requests else 0.0,
+                            'max': self.max_latency}}
+
+    async def answer(self, request: Any) -> Dict[str, Any]:
+        # result of a job (with its id, if any), or its error
+        if isinstance(request, dict) and request.get('command') == 'stats':
+            return self.stats()
+        start = perf_counter()
+        self.active += 1
+        # the request itself until it's made a job, so that errors keep its id
+        job: Dict[str, Any] = request if isinstance(request, dict) else {}
+        try:
+            job = make_job(request, self.command)
+            key = json.dumps({name: value for name, value in job.items() if name != 'id'},
+                             sort_keys=True, ensure_ascii=False)
+            result = self.results.get(key)
+            if result is None:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, answer_job, job, self.config)
+                if 'error' not in result:
+                    self.results.put(key, result,
+                                     len(key) + len(json.dumps(result, ensure_ascii=False)))
+            else:
+                self.hits += 1
+        except Exception as err:
+            result = {'error': str(err)}
+        finally:
+            self.active -= 1
+        latency = perf_counter() - start
+        self.requests += 1
+        self.errors += 'error' in result
+        self.latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if 'id' in job:
+            result = {'id': job['id'], **result}
+        return result
+
+    async def lines(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # a job per line, results are written as JSON lines as soon as they are ready,
+        # i.e. not necessarily in order (see the "id" of jobs)
+        async def respond(line: bytes):
+            try:
+                request = json.loads(line)
+            except ValueError as err:
+                result = {'job': line.decode(errors='replace'), 'error': str(err)}
+            else:
+                result = await self.answer(request)
+            writer.write(json.dumps(result, ensure_ascii=False).encode() + b'\n')
+            await writer.drain()
+
+        tasks = []
+        while line := (await reader.readline()).strip():
+            tasks.append(asyncio.create_task(respond(line)))
+        await asyncio.gather(*tasks)
+        writer.close()
+
+    async def http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # POST a job to any path, GET /stats for the counters
+        # (so does a {"command": "stats"} job)
+        while request_line := await reader.readline():
+            parts = request_line.decode('latin-1').split(' ', 2)
+            if len(parts) < 3:
+                break
+            method, target, _ = parts
+            headers: Dict[str, str] = {}
+            while (line := await reader.readline()).strip():
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            status, result = self.route(method, target)
+            if status == 200 and method == 'POST':
+                try:
+                    result = await self.answer(json.loads(body))
+                except ValueError as err:
+                    result = {'error': str(err)}
+                status = 400 if 'error' in result else 200
+            data = json.dumps(result, ensure_ascii=False).encode()
+            writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close':
+                break
+        writer.close()
+
+    def route(self, method: str, target: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        if method == 'GET' and target == '/stats':
+            return 200, self.stats()
+        if method == 'POST':
+            return 200, None
+        return 404, {'error': f"{method} {target}"}
+
+    async def run(self, socket: Optional[str] = None,
+                  host: str = SERVER_HOST, port: int = SERVER_PORT):
+        if socket:
+            server = await asyncio.start_unix_server(self.lines, path=socket)
+            print(f"Listening on {socket}", file=stderr)
+        else:
+            server = await asyncio.start_server(self.http, host, port)
+            print(f"Listening on http://{host}:{port}", file=stderr)
+        try:
+            # stop as if interrupted
+            asyncio.get_running_loop().add_signal_handler(SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass
+        async with server:
+            await server.serve_forever()
+
+
+def serve(config: Config, socket: Optional[str] = None,
+          host: str = SERVER_HOST, port: int = SERVER_PORT,
+          workers: int = 1, command: str = JOB_COMMANDS[0]):
+    # until interrupted
+    server = Server(config, workers, command)
+    try:
+        asyncio.run(server.run(socket, host, port))
+    except asyncio.CancelledError:
+        pass
+    finally:
+        server.executor.shutdown(wait=False, cancel_futures=True)
+        if socket and path.exists(socket):
+            remove(socket)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterator, List, Optional
+
+from constants import *
+from helpers import bold, green, red, display, first_set, read_columns, write_columns
+
+
+class TableRow:
+    # view of a row of a truth table, cells are read off the packed columns
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: 'TruthTable', index: int):
+        self.table = table
+        self.index = index
+
+    def __len__(self) -> int:
+        return len(self.table.header)
+
+    def __getitem__(self, column: int | slice) -> int | str | List[int | str]:
+        if isinstance(column, slice):
+            return [self.table.cell(self.index, i)
+                    for i in range(*column.indices(len(self)))]
+        return self.table.cell(self.index, column % len(self))
+
+    def __iter__(self) -> Iterator[int | str]:
+        return (self.table.cell(self.index, i) for i in range(len(self)))
+
+    def __eq__(self, __value) -> bool:
+        if isinstance(__value, (TableRow, list, tuple)):
+            return list(self) == list(__value)
+        return False
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class TruthTable:
+    # a column packs the truth values of every row into bytes:
+    # bit i of byte j holds the value at row 8j + i
+    def __init__(self, variables: List[str], sentences: List[str],
+                 columns: List[int | bytes | memoryview], marks: Optional[int] = None):
+        # marks: packed column of rows marked with a check, the others with a cross
+        self.variables = variables
+        self.sentences = sentences
+        self.rows = 1 << len(variables)
+        size = (self.rows + 7) // 8
+        header = variables + sentences
+        if marks is not None:
+            header = header + [MARK_COLUMN]
+            columns = columns + [marks]
+        self.header = header
+        # packed bytes, or views of a mapped file
+        self.columns: List[bytes | memoryview] = [
+            column.to_bytes(size, 'little') if isinstance(column, int) else column
+            for column in columns
+        ]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index: int | slice) -> TableRow | List[TableRow]:
+        if isinstance(index, slice):
+            # views of the rows in the slice only
+            return [TableRow(self, i) for i in range(*index.indices(self.rows))]
+        if not -self.rows <= index < self.rows:
+            raise IndexError(index)
+        return TableRow(self, index % self.rows)
+
+    def __iter__(self) -> Iterator[TableRow]:
+        # rows are produced lazily, one view at a time
+        return (TableRow(self, index) for index in range(self.rows))
+
+    def __eq__(self, __value) -> bool:
+        if isinstance(__value, TruthTable):
+            return self.header == __value.header and self.columns == __value.columns
+        return False
+
+    def __repr__(self) -> str:
+        return f"TruthTable({self.header}, rows={self.rows})"
+
+    def cell(self, row: int, column: int) -> int | str:
+        value = self.columns[column][row >> 3] >> (row & 7) & 1
+        if self.header[column] == MARK_COLUMN:
+            return f" {bold(green(CHECK_MARK) if value else red(CROSS_MARK))} "
+        return value
+
+    def column(self, sentence: Any) -> int:
+        # packed column of a sentence (or its display text), bit i holds row i
+        name = sentence if isinstance(sentence, str) else display(sentence)
+        # bits past the last row may be padding
+        mask = (1 << self.rows) - 1
+        return int.from_bytes(self.columns[self.header.index(name)], 'little') & mask
+
+    def find(self, sentence: Any, value: int = 1) -> Optional[int]:
+        # first row where a sentence takes the value, if any
+        # the column is scanned a block at a time, so that columns of
+        # mapped files are never loaded whole
+        name = sentence if isinstance(sentence, str) else display(sentence)
+        column = self.columns[self.header.index(name)]
+        # blocks without a match are all ones when looking for a zero
+        skipped = bytes([0 if value else 0xff]) * SCAN_BLOCK_SIZE
+        for start in range(0, len(column), SCAN_BLOCK_SIZE):
+            block = column[start:start + SCAN_BLOCK_SIZE]
+            if block != skipped[:len(block)]:
+                bits = int.from_bytes(block, 'little')
+                if not value:
+                    bits ^= (1 << (8 * len(block))) - 1
+                row = 8 * start + first_set(bits)
+                # the match may be padding past the last row
+                return row if row < self.rows else None
+        return None
+
+    def assignment(self, row: int) -> Dict[str, int]:
+        # variable values at a row
+        return dict(zip(self.variables, self[row][:len(self.variables)]))
+
+    def all_true(self, sentence: Any) -> bool:
+        return self.find(sentence, 0) is None
+
+    def save(self, filepath: str):
+        # packed formats, see helpers.write_columns
+        end = -1 if MARK_COLUMN in self.header else None
+        write_columns(filepath, self.variables, self.sentences,
+                      self.columns[:end], self.rows)
+
+
+def load_table(filepath: str, labels: Optional[str] = None) -> TruthTable:
+    # tables saved as .ltt files are memory-mapped rather than read
+    variables, sentences, columns, rows = read_columns(filepath, labels)
+    assert rows == 1 << len(variables), TABLE_FILE_ERROR.format(filepath)
+    return TruthTable(variables, sentences, columns)